@@ -6,8 +6,11 @@ from datetime import datetime
 
 import time
 import io
-from docx import Document
-from PIL import Image, ImageDraw, ImageFont
+import exports
+from lazy import LazyModule
+
+# Only the task grid needs pandas; load it when the grid is first shown
+pd = LazyModule("pandas")
 
 # Page Config
 st.set_page_config(page_title="Roadmap Tracer", layout="wide", initial_sidebar_state="collapsed")
@@ -23,39 +26,26 @@ if 'active_page' not in st.session_state:
 if 'nav_radio' not in st.session_state:
     st.session_state['nav_radio'] = st.session_state['active_page']
 
-THEME_OPTIONS = [
-    "Cyberpunk",
-    "Sunset Neon",
-    "Aqua Glow",
-    "Ember Glow",
-    "Titanium",
-    "Anti Gravity"
-]
+THEME_OPTIONS = list(themes.THEMES)
 if 'theme' not in st.session_state:
     st.session_state['theme'] = THEME_OPTIONS[0]
 
+# Tasks rendered per page in View Tasks; keeps the widget count flat for huge roadmaps
+TASKS_PER_PAGE = 50
+
+# Matches listed under the task search box
+SEARCH_RESULTS = 20
+
 
 def apply_selected_theme(theme_name: str):
-    """Inject CSS for the chosen theme."""
-    if theme_name == "Cyberpunk":
-        st.markdown(themes.get_cyberpunk_theme(), unsafe_allow_html=True)
-    elif theme_name == "Sunset Neon":
-        st.markdown(themes.get_sunset_neon_theme(), unsafe_allow_html=True)
-    elif theme_name == "Aqua Glow":
-        st.markdown(themes.get_aqua_glow_theme(), unsafe_allow_html=True)
-    elif theme_name == "Ember Glow":
-        st.markdown(themes.get_ember_glow_theme(), unsafe_allow_html=True)
-    elif theme_name == "Titanium":
-        st.markdown(themes.get_titanium_theme(), unsafe_allow_html=True)
-    elif theme_name == "Anti Gravity":
-        st.markdown(themes.get_antigravity_theme(), unsafe_allow_html=True)
+    """Inject the shell CSS and the chosen theme as one prebuilt style element."""
+    st.markdown(themes.page_css(theme_name), unsafe_allow_html=True)
 
 
 def import_roadmap(name, text):
     # Normalize name and block duplicates
     chosen_name = (name or "Untitled Roadmap").strip() or "Untitled Roadmap"
-    existing = db.get_roadmaps()
-    if any(r['name'].strip().lower() == chosen_name.lower() for r in existing):
+    if db.roadmap_name_exists(chosen_name):
         st.warning("A roadmap with this name already exists. Please rename it first.")
         return False
 
@@ -63,159 +53,25 @@ def import_roadmap(name, text):
         st.error("Please paste some roadmap text.")
         return False
 
-    roadmap_id = db.save_roadmap(chosen_name, text)
-    parsed_items = parser.parse_roadmap(text)
-
-    timeframe_map = {}
-    count_tf = 0
-    for item in parsed_items:
-        if item['type'] == 'timeframe':
-            parent_id = None
-            if item['parent_label'] and item['parent_label'] in timeframe_map:
-                parent_id = timeframe_map[item['parent_label']]
-
-            tf_id = db.save_timeframe(roadmap_id, item['label'], item['granularity'], parent_id)
-            timeframe_map[item['label']] = tf_id
-            count_tf += 1
-
-    unassigned_id = None
-    count_tasks = 0
-    for item in parsed_items:
-        if item['type'] == 'task':
-            tf_label = item['timeframe_label']
-            tf_id = None
-
-            if tf_label == "Unassigned":
-                if not unassigned_id:
-                    unassigned_id = db.save_timeframe(roadmap_id, "Unassigned", "generic")
-                tf_id = unassigned_id
-            elif tf_label in timeframe_map:
-                tf_id = timeframe_map[tf_label]
-            else:
-                if not unassigned_id:
-                    unassigned_id = db.save_timeframe(roadmap_id, "Unassigned", "generic")
-                tf_id = unassigned_id
-
-            db.save_task(tf_id, item['title'])
-            count_tasks += 1
+    # Roadmap, timeframes and tasks are written in one transaction, streamed
+    # straight from the parser; an import is parsed once, so it isn't cached
+    result = db.bulk_import_roadmap(chosen_name, text, parser.iter_parse(text))
+    if result is None:
+        st.error("Failed to import roadmap.")
+        return False
 
+    roadmap_id, count_tf, count_tasks = result
     st.success(f"Imported {count_tf} timeframes and {count_tasks} tasks!")
     return True
 
 
-def build_pdf(roadmap_label, tasks):
-    """Generate a simple PDF of the roadmap tasks grouped by timeframe."""
-    try:
-        from fpdf import FPDF
-    except ImportError:
-        st.error("PDF generation requires the 'fpdf' package. Install with: pip install fpdf")
-        return None
-
-    # Helper to sanitize text for latin-1
-    def clean(text):
-        return text.encode('latin-1', 'replace').decode('latin-1')
-
-    # Group tasks by timeframe
-    grouped = {}
-    for t in tasks:
-        grouped.setdefault(t['timeframe_label'], []).append(t)
-
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Helvetica", "B", 16)
-    pdf.cell(0, 10, clean(roadmap_label), ln=True)
-    pdf.ln(4)
-
-    pdf.set_font("Helvetica", "", 12)
-    for timeframe, items in grouped.items():
-        pdf.set_font("Helvetica", "B", 13)
-        pdf.cell(0, 8, clean(timeframe), ln=True)
-        pdf.set_font("Helvetica", "", 11)
-        for idx, item in enumerate(items, start=1):
-            pdf.multi_cell(0, 7, f"- {clean(item['title'])}")
-        pdf.ln(2)
-
-    pdf_bytes = pdf.output(dest="S").encode("latin-1")
-    return pdf_bytes
-
-def build_txt(roadmap_name, tasks):
-    output = f"Roadmap: {roadmap_name}\n\n"
-    current_group = None
-    for task in tasks:
-        if task['timeframe_label'] != current_group:
-            current_group = task['timeframe_label']
-            output += f"\n[{current_group}]\n"
-        status = "[x]" if task['is_done'] else "[ ]"
-        output += f"{status} {task['title']}\n"
-    return output.encode('utf-8')
-
-def build_docx(roadmap_name, tasks):
-    doc = Document()
-    doc.add_heading(f"Roadmap: {roadmap_name}", 0)
-    
-    current_group = None
-    for task in tasks:
-        if task['timeframe_label'] != current_group:
-            current_group = task['timeframe_label']
-            doc.add_heading(current_group, level=2)
-        
-        status = " (Done)" if task['is_done'] else ""
-        doc.add_paragraph(f"{task['title']}{status}", style='List Bullet')
-    
-    buffer = io.BytesIO()
-    doc.save(buffer)
-    return buffer.getvalue()
-
-def build_jpeg(roadmap_name, tasks):
-    # Estimate height
-    line_height = 30
-    header_height = 60
-    padding = 20
-    
-    # Calculate total height roughly
-    num_lines = len(tasks) + len(set(t['timeframe_label'] for t in tasks)) * 2 + 2
-    img_height = (num_lines * line_height) + header_height + (padding * 2)
-    img_width = 800
-    
-    img = Image.new('RGB', (img_width, img_height), color=(255, 255, 255))
-    d = ImageDraw.Draw(img)
-    
-    try:
-        # Try to load a nicer font, otherwise default
-        font = ImageFont.truetype("arial.ttf", 16)
-        header_font = ImageFont.truetype("arial.ttf", 24)
-    except IOError:
-        font = ImageFont.load_default()
-        header_font = ImageFont.load_default()
-        
-    y = padding
-    d.text((padding, y), f"Roadmap: {roadmap_name}", fill=(0, 0, 0), font=header_font)
-    y += header_height
-    
-    current_group = None
-    for task in tasks:
-        if task['timeframe_label'] != current_group:
-            current_group = task['timeframe_label']
-            y += line_height
-            d.text((padding, y), current_group, fill=(0, 0, 150), font=font)
-            y += line_height
-            
-        status = "[x]" if task['is_done'] else "[ ]"
-        d.text((padding + 20, y), f"{status} {task['title']}", fill=(0, 0, 0), font=font)
-        y += line_height
-        
-    buffer = io.BytesIO()
-    img.save(buffer, format="JPEG")
-    return buffer.getvalue()
-
 def handle_rename(roadmap_id: int, state_key: str):
     """Rename a roadmap directly from the editable field."""
     new_name = (st.session_state.get(state_key, "") or "").strip()
     if not new_name:
         st.warning("Please enter a name.")
         return
-    existing = db.get_roadmaps()
-    if any(r['id'] != roadmap_id and r['name'].strip().lower() == new_name.lower() for r in existing):
+    if db.roadmap_name_exists(new_name, exclude_id=roadmap_id):
         st.warning("A roadmap with this name already exists. Please choose a different name.")
         return
     db.rename_roadmap(roadmap_id, new_name)
@@ -223,6 +79,56 @@ def handle_rename(roadmap_id: int, state_key: str):
     st.rerun()
 
 
+def change_task_page(scope_key: str, cursor):
+    """Page the task list forward (cursor = last task shown) or back (cursor None)."""
+    cursors = st.session_state.setdefault('task_page_cursors', {}).setdefault(scope_key, [])
+    if cursor is None:
+        if cursors:
+            cursors.pop()
+    else:
+        cursors.append(cursor)
+
+
+def handle_task_toggle(task: dict, state_key: str):
+    """Queue a checkbox change; db writes toggles behind and reads already include them."""
+    db.queue_task_status(task, st.session_state[state_key])
+
+
+def render_task_grid(roadmap_id: int, timeframe_id, scope_key: str):
+    """Show the filtered tasks in one editable table and save every change in one write."""
+    tasks = db.get_tasks(roadmap_id, subtree_of=timeframe_id)
+    if not tasks:
+        st.info("No tasks found for this selection.")
+        return
+
+    original = pd.DataFrame.from_records(
+        tasks, columns=['id', 'is_done', 'timeframe_label', 'title'], index='id'
+    ).rename(columns={'is_done': 'Done', 'timeframe_label': 'Timeframe', 'title': 'Task'})
+    original['Done'] = original['Done'].astype(bool)
+
+    # Inside a form, ticking boxes doesn't rerun the script; only Save does
+    with st.form(f"task_grid_form_{scope_key}", border=False):
+        edited = st.data_editor(
+            original,
+            key=f"task_grid_{scope_key}",
+            hide_index=True,
+            use_container_width=True,
+            disabled=['Timeframe', 'Task'],
+            column_config={'Done': st.column_config.CheckboxColumn('Done', width='small')},
+        )
+        submitted = st.form_submit_button("Save changes", type="primary")
+
+    if submitted:
+        # Rows keep their task id as index, so the diff is one vectorized compare
+        changed = edited['Done'][edited['Done'] != original['Done']]
+        saved = db.update_task_statuses(zip(changed.index.tolist(), changed.tolist()))
+        if saved:
+            st.toast(f"Saved {saved} task{'s' if saved != 1 else ''}.")
+            st.rerun(scope="fragment")
+        else:
+            st.info("No changes to save.")
+
+
 def generate_roadmap_text(goal: str) -> str:
     """Generate a simple 4-week roadmap based on a goal string."""
     goal_clean = goal.strip() or "your goal"
@@ -357,8 +263,8 @@ def show_edit_page():
             
         if submitted:
             # We need to pass the parser function. 
-            # Since we are in app.py and imported parser, we can pass parser.parse_roadmap
-            success = db.update_roadmap_content(roadmap_id, new_text, parser.parse_roadmap)
+            # The cached parser also makes re-parsing the stored old text free
+            success = db.update_roadmap_content(roadmap_id, new_text, parser.parse_roadmap_cached)
             if success:
                 st.success("Roadmap updated successfully!")
                 time.sleep(1)
@@ -372,8 +278,144 @@ def show_edit_page():
             st.rerun()
 
 
+def render_progress(slot, counts: dict):
+    """Draw the header progress bar into its slot, replacing what was there."""
+    total_tasks = counts['total']
+    progress = counts['done'] / total_tasks if total_tasks > 0 else 0
+    with slot.container():
+        st.markdown(f"<div style='text-align: right; margin-bottom: 5px; color:#e7edf7; font-size: 0.9rem; font-weight: 600;'>Progress: {int(progress*100)}%</div>", unsafe_allow_html=True)
+        st.progress(progress)
+
+
+@st.fragment
+def render_download_panel(roadmap_id: int, roadmap_name: str):
+    """Download Roadmap controls. A fragment, so picking a format doesn't rerun the page."""
+    dl_fmt = st.selectbox("Format", list(exports.EXPORT_FORMATS), label_visibility="collapsed")
+
+    # Align with the buttons in other columns
+    # Created date text is roughly 2 lines height or 30px.
+    # Let's try 28px to align with the button in Col 1 which is under the date.
+    st.markdown("<div style='height: 28px'></div>", unsafe_allow_html=True)
+
+    if db.get_progress(roadmap_id)['total'] == 0:
+        st.button("Save", disabled=True, use_container_width=True)
+        return
+
+    # Files are built only when asked for (and cached per content revision);
+    # toggles rerun the task list, not this panel, so nothing here goes stale
+    button_slot = st.empty()
+    if not button_slot.button("Prepare", key=f"prepare_export_{roadmap_id}", use_container_width=True):
+        return
+
+    data, mime, ext = exports.get_export(roadmap_id, roadmap_name, dl_fmt)
+    if not data:
+        st.error(f"Failed to build the {dl_fmt} file.")
+        return
+
+    button_slot.download_button(
+        "Save",
+        data,
+        file_name=f"{roadmap_name}.{ext}",
+        mime=mime,
+        type="secondary",
+        use_container_width=True
+    )
+
+
+@st.fragment
+def render_task_list(roadmap_id: int, timeframe_id, progress_slot):
+    """
+    Task list plus the header progress bar. timeframe_id (from the Timeline
+    Filter) shows that timeframe with everything nested in it.
+
+    A fragment: checkbox toggles, paging and grid saves rerun only this
+    function, not the CSS, roadmap list, filters and download panel around it.
+    """
+    counts = db.get_progress(roadmap_id)
+    render_progress(progress_slot, counts)
+
+    view_mode = st.radio("Task view", ["List", "Grid"], horizontal=True,
+                         key="task_view_mode", label_visibility="collapsed")
+    page_scope = f"{roadmap_id}:{timeframe_id}"
+    if view_mode == "Grid":
+        render_task_grid(roadmap_id, timeframe_id, page_scope)
+        return
+
+    # Keyset pagination: remember the last task of every page we moved past
+    cursors = st.session_state.setdefault('task_page_cursors', {}).setdefault(page_scope, [])
+    tasks = db.get_tasks(roadmap_id, subtree_of=timeframe_id,
+                         after=cursors[-1] if cursors else None, limit=TASKS_PER_PAGE + 1)
+    if not tasks and cursors:
+        # The page we were on is gone (tasks removed by an edit); start over
+        cursors.clear()
+        tasks = db.get_tasks(roadmap_id, subtree_of=timeframe_id, limit=TASKS_PER_PAGE + 1)
+    has_next = len(tasks) > TASKS_PER_PAGE
+    tasks = tasks[:TASKS_PER_PAGE]
+
+    if not tasks:
+        st.info("No tasks found for this selection.")
+        return
+
+    current_group = None
+    for task in tasks:
+        if task['timeframe_id'] != current_group:
+            current_group = task['timeframe_id']
+            st.markdown("<div style='height: 20px'></div>", unsafe_allow_html=True)
+            st.markdown(f"### {task['timeframe_label']} "
+                        f"`{task['timeframe_done_count']}/{task['timeframe_task_count']}`")
+
+        c1, c2 = st.columns([0.05, 0.95])
+        with c1:
+            task_key = f"task_{task['id']}"
+            st.checkbox("", value=bool(task['is_done']), key=task_key,
+                        on_change=handle_task_toggle, args=(task, task_key))
+        with c2:
+            if task['is_done']:
+                st.markdown(f"~~{task['title']}~~")
+            else:
+                st.markdown(task['title'])
+
+    if cursors or has_next:
+        if timeframe_id:
+            filtered_total = db.count_subtree_tasks(timeframe_id)
+        else:
+            filtered_total = counts['total']
+        page_count = max(1, -(-filtered_total // TASKS_PER_PAGE))
+
+        st.markdown("<div style='height: 20px'></div>", unsafe_allow_html=True)
+        p1, p2, p3 = st.columns([0.2, 0.6, 0.2])
+        with p1:
+            st.button("Previous", key="task_page_prev", disabled=not cursors, use_container_width=True,
+                      on_click=change_task_page, args=(page_scope, None))
+        with p2:
+            st.markdown(f"<div style='text-align: center; color:#a0a8b8; padding-top: 0.5rem;'>Page {len(cursors) + 1} of {page_count}</div>", unsafe_allow_html=True)
+        with p3:
+            last = tasks[-1]
+            st.button("Next", key="task_page_next", disabled=not has_next, use_container_width=True,
+                      on_click=change_task_page, args=(page_scope, (last['timeframe_id'], last['id'])))
+
+
+@st.fragment
+def render_task_search():
+    """Search box over the tasks of every roadmap. A fragment, so searching doesn't rerun the page."""
+    query = st.text_input("Search tasks", key="task_search_query", label_visibility="collapsed",
+                          placeholder="Search tasks in all roadmaps...")
+    if not query.strip():
+        return
+
+    results = db.search_tasks(query, SEARCH_RESULTS)
+    if not results:
+        st.info("No matching tasks.")
+        return
+    for task in results:
+        title = f"~~{task['title']}~~" if task['is_done'] else task['title']
+        st.markdown(f"**{task['roadmap_name']}** · {task['timeframe_label']} — {title}")
+    st.divider()
+
+
 def show_view_page():
-    roadmaps = db.get_roadmaps()
+    # Summaries only; a roadmap's raw text is loaded when it is opened for editing
+    roadmaps = db.get_roadmap_summaries()
     if not roadmaps:
         st.info("No roadmaps found. Go to 'Import Roadmap' to add one.")
         return
@@ -389,6 +431,8 @@ def show_view_page():
     with col_head_title:
         st.markdown(f"<h1 class='page-title'>Your Tasks</h1>", unsafe_allow_html=True)
 
+    render_task_search()
+
     # 4-Column Layout
     c1, c2, c3, c4 = st.columns(4, gap="medium")
 
@@ -408,17 +452,12 @@ def show_view_page():
         
         if st.button("Edit Roadmap", type="secondary", use_container_width=True):
              # Reconstruct text for editing
-             tasks = db.get_all_tasks_for_roadmap(selected_roadmap_id)
-             raw_text = selected_roadmap.get('raw_text', "")
+             raw_text = db.get_roadmap_text(selected_roadmap_id)
              if not raw_text:
-                 current_group = None
-                 reconstructed = ""
-                 for t in tasks:
-                     if t['timeframe_label'] != current_group:
-                         current_group = t['timeframe_label']
-                         reconstructed += f"\n{current_group}\n"
-                     reconstructed += f"{t['title']}\n"
-                 raw_text = reconstructed.strip()
+                 buffer = io.BytesIO()
+                 exports.write_grouped_text(db.iter_tasks(selected_roadmap_id), buffer,
+                                            bracket_groups=False, show_status=False)
+                 raw_text = buffer.getvalue().decode('utf-8').strip()
              
              st.session_state['edit_roadmap_id'] = selected_roadmap_id
              st.session_state['edit_roadmap_text'] = raw_text
@@ -427,26 +466,29 @@ def show_view_page():
 
     # Now that we have selected_roadmap_id, we can render the progress bar in the header
     with col_head_prog:
-        # Progress Bar
-        all_tasks_for_progress = db.get_tasks(selected_roadmap_id, None)
-        total_tasks = len(all_tasks_for_progress)
-        completed_tasks = sum(1 for t in all_tasks_for_progress if t['is_done'])
-        progress = completed_tasks / total_tasks if total_tasks > 0 else 0
-        
-        st.markdown(f"<div style='text-align: right; margin-bottom: 5px; color:#e7edf7; font-size: 0.9rem; font-weight: 600;'>Progress: {int(progress*100)}%</div>", unsafe_allow_html=True)
-        st.progress(progress)
+        # Drawn by the task list fragment, so a toggle refreshes it without a full rerun
+        progress_slot = st.empty()
 
     # Column 2: Timeline Filter
     with c2:
         st.markdown("<label style='font-size: 16px; font-weight: 800; color: #e7edf7; display: block; margin-bottom: 0.5rem;'>Timeline Filter</label>", unsafe_allow_html=True)
         # Get timeframes without granularity filter
-        timeframes = db.get_timeframes(selected_roadmap_id, None)
-        timeframe_options = {"All": None}
-        for tf in timeframes:
-            timeframe_options[tf['label']] = tf['id']
-            
-        selected_tf_label = st.selectbox("Timeline Filter", list(timeframe_options.keys()), label_visibility="collapsed")
-        selected_tf_id = timeframe_options[selected_tf_label]
+        timeframes = {tf['id']: tf for tf in db.get_timeframes(selected_roadmap_id, None)}
+
+        def timeframe_name(tf_id):
+            # Labels repeat (e.g. "Week 1" under every month), so name the parents too
+            if tf_id is None:
+                return "All"
+            tf = timeframes[tf_id]
+            parents = []
+            parent = timeframes.get(tf['parent_id'])
+            while parent is not None:
+                parents.insert(0, parent['label'])
+                parent = timeframes.get(parent['parent_id'])
+            return f"{tf['label']} ({' › '.join(parents)})" if parents else tf['label']
+
+        selected_tf_id = st.selectbox("Timeline Filter", [None] + list(timeframes),
+                                      format_func=timeframe_name, label_visibility="collapsed")
         
         # Align with the buttons in other columns
         st.markdown("<div style='height: 28px'></div>", unsafe_allow_html=True)
@@ -459,49 +501,7 @@ def show_view_page():
     # Column 3: Download Roadmap
     with c3:
         st.markdown("<label style='font-size: 16px; font-weight: 800; color: #e7edf7; display: block; margin-bottom: 0.5rem;'>Download Roadmap</label>", unsafe_allow_html=True)
-        dl_fmt = st.selectbox("Format", ["PDF", "TXT", "DOCX", "JPEG"], label_visibility="collapsed")
-        
-        # Align with the buttons in other columns
-        # Created date text is roughly 2 lines height or 30px. 
-        # Let's try 28px to align with the button in Col 1 which is under the date.
-        st.markdown("<div style='height: 28px'></div>", unsafe_allow_html=True)
-        
-        # all_tasks_for_progress is already fetched above
-        has_tasks = bool(all_tasks_for_progress)
-        
-        if has_tasks:
-            data = None
-            mime = ""
-            ext = ""
-            
-            if dl_fmt == "PDF":
-                data = build_pdf(selected_roadmap_name, all_tasks_for_progress)
-                mime = "application/pdf"
-                ext = "pdf"
-            elif dl_fmt == "TXT":
-                data = build_txt(selected_roadmap_name, all_tasks_for_progress)
-                mime = "text/plain"
-                ext = "txt"
-            elif dl_fmt == "DOCX":
-                data = build_docx(selected_roadmap_name, all_tasks_for_progress)
-                mime = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                ext = "docx"
-            elif dl_fmt == "JPEG":
-                data = build_jpeg(selected_roadmap_name, all_tasks_for_progress)
-                mime = "image/jpeg"
-                ext = "jpg"
-            
-            if data:
-                st.download_button(
-                    "Save",
-                    data,
-                    file_name=f"{selected_roadmap_name}.{ext}",
-                    mime=mime,
-                    type="secondary",
-                    use_container_width=True
-                )
-        else:
-             st.button("Save", disabled=True, use_container_width=True)
+        render_download_panel(selected_roadmap_id, selected_roadmap_name)
 
     # Column 4: Edit Name
     with c4:
@@ -520,29 +520,7 @@ def show_view_page():
 
     st.divider()
 
-    tasks = db.get_tasks(selected_roadmap_id, selected_tf_id)
-
-    if not tasks:
-        st.info("No tasks found for this selection.")
-    else:
-        current_group = None
-        for task in tasks:
-            if task['timeframe_label'] != current_group:
-                current_group = task['timeframe_label']
-                st.markdown("<div style='height: 20px'></div>", unsafe_allow_html=True)
-                st.markdown(f"### {current_group}")
-
-            c1, c2 = st.columns([0.05, 0.95])
-            with c1:
-                is_done = st.checkbox("", value=bool(task['is_done']), key=f"task_{task['id']}")
-                if is_done != bool(task['is_done']):
-                    db.update_task_status(task['id'], is_done)
-                    st.rerun()
-            with c2:
-                if task['is_done']:
-                    st.markdown(f"~~{task['title']}~~")
-                else:
-                    st.markdown(task['title'])
+    render_task_list(selected_roadmap_id, selected_tf_id, progress_slot)
 
 
 def main():
@@ -554,126 +532,11 @@ def main():
         del st.session_state['force_redirect']
         st.rerun()
 
-    # UI shell styling for nav dots, theme list, and slide animation
-    st.markdown(
-        """
-        <style>
-            /* section[data-testid="stSidebar"] {display: none;} */
-            .main .block-container {max-width: 1250px; padding: 0.8rem 1rem 1.8rem 1rem;}
-            .page-title {margin: 0 0 1rem 0; font-size: 40px; font-weight: 800; color: #e7edf7;}
-            /* tighten column padding */
-            div[data-testid="column"] {padding-left: 6px !important; padding-right: 6px !important;}
-            /* bolder labels */
-            label[data-testid="stMetricLabel"], .stTextInput label, .stTextArea label, .stSelectbox label {
-                font-size: 16px !important;
-                font-weight: 800 !important;
-                color: #e7edf7 !important;
-            }
-            /* Global Button Styling - Unified */
-            button[data-testid^="stBaseButton-"] {
-                border: none !important;
-                background: linear-gradient(90deg, var(--primary), var(--accent)) !important;
-                color: #000000 !important;
-                font-weight: 700 !important;
-                text-transform: uppercase;
-                letter-spacing: 0.05em;
-                border-radius: 8px !important;
-                padding: 0.5rem 1rem !important;
-                box-shadow: 0 4px 14px rgba(0,0,0,0.25);
-                transition: transform 0.15s ease, box-shadow 0.2s ease;
-            }
-            
-            button[data-testid^="stBaseButton-"]:hover {
-                transform: translateY(-2px);
-                /* Use theme primary color for glow */
-                box-shadow: 0 0 20px var(--primary) !important; 
-            }
-
-            /* Force text styling inside buttons */
-            button[data-testid^="stBaseButton-"] p, 
-            button[data-testid^="stBaseButton-"] div,
-            .stDownloadButton > button p,
-            .stDownloadButton > button div {
-                color: #000000 !important;
-            }
-
-            /* Active/Click Effect */
-            button[data-testid^="stBaseButton-"]:active,
-            .stDownloadButton > button:active {
-                transform: translateY(1px) !important;
-                box-shadow: 0 0 10px var(--primary) !important;
-            }
-            /* keep download button simple - actually unify it too */
-            .stDownloadButton>button {
-                border: none !important;
-                background: linear-gradient(90deg, var(--primary), var(--accent)) !important;
-                color: #000000 !important;
-                font-weight: 700 !important;
-                text-transform: uppercase;
-                letter-spacing: 0.05em;
-                border-radius: 8px !important;
-                padding: 0.5rem 1rem !important;
-                box-shadow: 0 4px 14px rgba(0,0,0,0.25);
-                transition: transform 0.15s ease, box-shadow 0.2s ease;
-            }
-            .stDownloadButton>button:hover {
-                transform: translateY(-2px);
-                box-shadow: 0 0 20px var(--primary) !important;
-            }
-
-            /* pointer cursor on selects */
-            .stSelectbox label {cursor: pointer;}
-            .stSelectbox div[data-baseweb="select"] > div {cursor: pointer;}
-
-            /* Nav dots */
-            .nav-dots [role="radiogroup"] {gap: 2rem !important; justify-content: center;}
-            .nav-dots label {
-                padding: 6px 10px 6px 28px;
-                margin: 0;
-                position: relative;
-                cursor: pointer;
-                font-size: 22px;
-                font-weight: 700;
-                letter-spacing: 0.01em;
-                color: #e7edf7;
-            }
-            .nav-dots label div:first-of-type {display: none;} /* hide default radio icon */
-            .nav-dots label div:last-of-type {
-                color: inherit;
-                font-size: inherit;
-                font-weight: inherit;
-            }
-            .nav-dots label::before {
-                content: "";
-                position: absolute;
-                left: 0;
-                top: 50%;
-                transform: translateY(-50%);
-                width: 14px;
-                height: 14px;
-                border-radius: 50%;
-                border: 2px solid #6b768a;
-                background: transparent;
-            }
-            .nav-dots label:has(input:checked)::before {
-                background: var(--primary);
-                border-color: var(--primary);
-                box-shadow: 0 0 0 4px rgba(255, 255, 255, 0.1);
-            }
-
-
-
-            .page-shell {animation: slideIn 0.35s ease;}
-            @keyframes slideIn {from {opacity: 0; transform: translateY(8px);} to {opacity: 1; transform: translateY(0);}}
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
+    # UI shell styling and the selected theme, prebuilt and minified in themes.py
+    apply_selected_theme(st.session_state['theme'])
 
     st.markdown("<h1 style='text-align: center; margin-bottom: 2rem;'>Roadmap Tracer</h1>", unsafe_allow_html=True)
 
-    apply_selected_theme(st.session_state['theme'])
-
     # Navigation and Theme Selector
     col_nav, col_theme = st.columns([0.75, 0.25])
     
@@ -0,0 +1,104 @@
+"""
+Checks the cold import time of the app module against a budget.
+
+Imports the module in a fresh interpreter under `python -X importtime`,
+takes the cumulative time of the module's own entry (interpreter startup
+such as `site` is left out) and lists its slowest direct imports. Fails
+(exit code 1) if that time is over budget or if any of the heavy
+libraries that should load lazily (python-docx, Pillow, fpdf, pandas)
+was imported at startup.
+
+The default budget sits just above `import app` as measured with
+Streamlit 1.65 (medians of 450-550 ms), so a real regression fails it; set
+IMPORT_BUDGET_MS on slower machines.
+
+Usage: python benchmarks/bench_import_time.py [--module app] [--budget-ms N] [--runs N]
+The budget can also be set with the IMPORT_BUDGET_MS environment variable.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET_MS = 650
+
+# Must only be imported by the code paths that use them
+LAZY_MODULES = ("docx", "PIL", "fpdf", "pandas")
+
+
+def measure(module, workdir):
+    """
+    Import module in a new interpreter. Returns (cumulative µs of module,
+    [(cumulative µs, name)] of its direct imports, names of every import).
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=workdir, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    total = 0
+    children = []
+    pending = []  # depth-1 imports since the last top-level one
+    names = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented two spaces per level and are listed
+        # before the module that triggered them
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        names.add(name)
+        if depth == 1:
+            pending.append((int(cumulative), name))
+        elif depth == 0:
+            if name == module:
+                total = int(cumulative)
+                children = pending
+            pending = []
+    return total, children, names
+
+
+def main(argv):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--module", default="app")
+    arg_parser.add_argument("--budget-ms", type=float,
+                            default=float(os.environ.get("IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS)))
+    arg_parser.add_argument("--runs", type=int, default=5)
+    arg_parser.add_argument("--top", type=int, default=10)
+    args = arg_parser.parse_args(argv)
+
+    # Importing app initializes roadmap.db in the working directory; keep that out of the repo
+    workdir = tempfile.mkdtemp()
+    totals = []
+    children = []
+    names = set()
+    for _ in range(args.runs):
+        total, children, names = measure(args.module, workdir)
+        totals.append(total / 1000)
+    total_ms = statistics.median(totals)
+
+    print(f"import {args.module}: {total_ms:.1f} ms median of {args.runs} (budget {args.budget_ms:.0f} ms)")
+    for us, name in sorted(children, reverse=True)[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    eager = sorted({name.split(".")[0] for name in names} & set(LAZY_MODULES))
+    if eager:
+        print(f"FAIL: imported at startup: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: {total_ms:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,55 @@
+"""
+Compares the memory of parser.parse_roadmap (a list of dicts) with
+parser.parse_roadmap_compact (array columns) on 100k to 1M line roadmaps.
+
+Measured with tracemalloc: "held" is what the result keeps alive once parsing
+is done, "peak" the most allocated at any point while parsing. The source
+text is allocated beforehand and counted in neither. Times are taken in a
+separate run without tracing, which slows allocation down.
+
+Usage: python benchmarks/bench_parse_memory.py [line_count ...]
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parser
+from bench_parser import generate_roadmap
+
+
+def measure(parse, text):
+    start = time.perf_counter()
+    parse(text)
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    result = parse(text)
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, held, peak, elapsed
+
+
+def main(argv):
+    counts = [int(arg) for arg in argv] or [100_000, 250_000, 500_000, 1_000_000]
+    parsers = {
+        "dicts": parser.parse_roadmap,
+        "compact": parser.parse_roadmap_compact,
+    }
+    print(f"{'lines':>9}  {'parser':>8}  {'held MB':>9}  {'peak MB':>9}  {'B/item':>7}  {'time':>7}")
+    for count in counts:
+        text = generate_roadmap(count)
+        for name, parse in parsers.items():
+            result, held, peak, elapsed = measure(parse, text)
+            print(f"{count:>9}  {name:>8}  {held / 2**20:9.1f}  {peak / 2**20:9.1f}"
+                  f"  {held / len(result):7.0f}  {elapsed:6.2f}s")
+            del result
+        print(f"{'':>9}  {'text':>8}  {len(text) / 2**20:9.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
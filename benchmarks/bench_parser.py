@@ -0,0 +1,125 @@
+"""
+Times parser.parse_roadmap on generated roadmaps of 100k to 1M lines.
+
+The "five-regex" column is the parser as it was before the single
+tokenizer: four heading regexes and a task regex, compiled on every call
+and tried one after another. It is kept here so both columns can be
+reproduced from the same run.
+
+Usage: python benchmarks/bench_parser.py [line_count ...]
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parser
+
+
+def parse_roadmap_five_regex(text):
+    """The parser before the single tokenizer, for comparison; same output minus the node indexes."""
+    items = []
+    current_month = current_week = current_day = current_hour = None
+
+    re_month = re.compile(r'^(month\s*\d+.*)', re.IGNORECASE)
+    re_week = re.compile(r'^(week\s*\d+.*)', re.IGNORECASE)
+    re_day = re.compile(r'^(day\s*\d+.*)', re.IGNORECASE)
+    re_hour = re.compile(r'^(hour\s*\d+.*)', re.IGNORECASE)
+    re_task = re.compile(r'^(\s*[-*•]|\s*\d+\.)\s*(.*)')
+
+    for line in parser._iter_text_lines(text):
+        line = line.strip()
+        if not line:
+            continue
+
+        m_match = re_month.match(line)
+        if m_match:
+            current_month = m_match.group(1)
+            current_week = current_day = current_hour = None
+            items.append({"type": "timeframe", "label": current_month,
+                          "granularity": "month", "parent_label": None})
+            continue
+        w_match = re_week.match(line)
+        if w_match:
+            current_week = w_match.group(1)
+            current_day = current_hour = None
+            items.append({"type": "timeframe", "label": current_week,
+                          "granularity": "week", "parent_label": current_month})
+            continue
+        d_match = re_day.match(line)
+        if d_match:
+            current_day = d_match.group(1)
+            current_hour = None
+            items.append({"type": "timeframe", "label": current_day,
+                          "granularity": "day", "parent_label": current_week or current_month})
+            continue
+        h_match = re_hour.match(line)
+        if h_match:
+            current_hour = h_match.group(1)
+            items.append({"type": "timeframe", "label": current_hour,
+                          "granularity": "hour", "parent_label": current_day or current_week or current_month})
+            continue
+
+        t_match = re_task.match(line)
+        task_text = t_match.group(2).strip() if t_match else line
+
+        timeframe_label = "Unassigned"
+        granularity = "generic"
+        if current_hour:
+            timeframe_label, granularity = current_hour, "hour"
+        elif current_day:
+            timeframe_label, granularity = current_day, "day"
+        elif current_week:
+            timeframe_label, granularity = current_week, "week"
+        elif current_month:
+            timeframe_label, granularity = current_month, "month"
+        items.append({"type": "task", "title": task_text,
+                      "timeframe_label": timeframe_label, "granularity": granularity})
+    return items
+
+
+def generate_roadmap(line_count):
+    """Build a roadmap shaped like a real one: mostly bullet tasks under nested headings."""
+    lines = []
+    month = week = day = 0
+    while len(lines) < line_count:
+        month += 1
+        lines.append(f"Month {month} - Phase {month}")
+        for _ in range(4):
+            week += 1
+            lines.append(f"Week {week} - Focus")
+            for _ in range(5):
+                day += 1
+                lines.append(f"Day {day}")
+                lines.append(f"- Read chapter {day} of the handbook")
+                lines.append(f"* Practice exercise set {day}")
+                lines.append(f"{day % 9 + 1}. Review notes from day {day}")
+                lines.append(f"Write a short summary for day {day}")
+                lines.append("")
+    return "\n".join(lines[:line_count])
+
+
+def time_parse(parse, text):
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        items = parse(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return items, best
+
+
+def main(argv):
+    counts = [int(arg) for arg in argv] or [100_000, 250_000, 500_000, 1_000_000]
+    print(f"{'lines':>9}  {'items':>9}  {'five-regex':>10}  {'tokenizer':>10}  {'speedup':>7}")
+    for count in counts:
+        text = generate_roadmap(count)
+        _, before = time_parse(parse_roadmap_five_regex, text)
+        items, after = time_parse(parser.parse_roadmap, text)
+        print(f"{count:>9}  {len(items):>9}  {before:9.3f}s  {after:9.3f}s  {before / after:6.2f}x")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,133 @@
+"""
+Times what a checkbox toggle costs in View Tasks on a 2,000-task roadmap.
+
+"full" reruns the whole app script, which is what every toggle did before
+the task list became a fragment. "fragment" reruns only render_task_list,
+which is what a toggle does now. Both toggle the same checkbox each round.
+
+--before REV also times a full rerun of the app as of REV (checked out into
+a temporary git worktree), e.g. the last commit before the fragment change,
+so before and after come from the same run. Each variant runs in its own
+interpreter against its own database.
+
+Usage: python benchmarks/bench_rerun.py [--tasks N] [--rounds R] [--before REV]
+"""
+import argparse
+import logging
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TASKS_PER_WEEK = 50
+
+
+def fragment_script():
+    # Runs as its own script under AppTest, so it imports what it needs
+    import streamlit as st
+    import app
+
+    app.render_task_list(st.session_state['bench_roadmap_id'], None, st.empty())
+
+
+def time_toggles(at, task_key, rounds):
+    timings = []
+    for _ in range(rounds):
+        checkbox = at.checkbox(key=task_key)
+        checkbox.set_value(not checkbox.value)
+        start = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+    return timings
+
+
+def run_variant(mode, root, tasks, rounds):
+    """Time toggles of one variant in this process, against the code under root."""
+    sys.path.insert(0, root)
+    from streamlit.testing.v1 import AppTest
+    import db
+    import parser
+
+    # The unlabeled checkboxes log a warning on every run
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    # AppTest runs scripts in this process, so they share this db module
+    db.DB_FILE = os.path.join(tempfile.mkdtemp(), "bench_rerun.db")
+    db.init_db()
+    weeks = -(-tasks // TASKS_PER_WEEK)
+    text = "\n".join(f"Week {w}\n" + "\n".join(f"- Task {w}.{t}" for t in range(TASKS_PER_WEEK))
+                     for w in range(1, weeks + 1))
+    roadmap_id, _, _ = db.bulk_import_roadmap("bench", text, parser.parse_roadmap(text))
+    task_key = f"task_{db.get_tasks(roadmap_id)[0]['id']}"
+
+    if mode == "full":
+        at = AppTest.from_file(os.path.join(root, "app.py"), default_timeout=60)
+        at.session_state['db_initialized'] = True
+        at.session_state['active_page'] = "View Tasks"
+        at.session_state['nav_radio'] = "View Tasks"
+    else:
+        at = AppTest.from_function(fragment_script, default_timeout=60)
+        at.session_state['bench_roadmap_id'] = roadmap_id
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    timings = time_toggles(at, task_key, rounds)
+    if hasattr(db, "flush_task_updates"):
+        db.flush_task_updates()
+    print(f"{statistics.median(timings) * 1000:.1f} {min(timings) * 1000:.1f}")
+
+
+def measure(mode, root, args):
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--variant", mode, "--root", root,
+         "--tasks", str(args.tasks), "--rounds", str(args.rounds)],
+        cwd=tempfile.mkdtemp(), capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{mode} run in {root} failed:\n{proc.stderr[-2000:]}")
+    median, best = proc.stdout.split()[-2:]
+    return float(median), float(best)
+
+
+def main(argv):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--tasks", type=int, default=2000)
+    arg_parser.add_argument("--rounds", type=int, default=20)
+    arg_parser.add_argument("--before", metavar="REV", help="also time a full rerun of the app at REV")
+    arg_parser.add_argument("--variant", choices=["full", "fragment"], help=argparse.SUPPRESS)
+    arg_parser.add_argument("--root", default=ROOT, help=argparse.SUPPRESS)
+    args = arg_parser.parse_args(argv)
+
+    if args.variant:
+        run_variant(args.variant, args.root, args.tasks, args.rounds)
+        return
+
+    variants = [("full", "full", ROOT), ("fragment", "fragment", ROOT)]
+    worktree = None
+    if args.before:
+        worktree = tempfile.mkdtemp()
+        subprocess.run(["git", "-C", ROOT, "worktree", "add", "--detach", worktree, args.before],
+                       check=True, capture_output=True)
+        variants.insert(0, (f"before {args.before} (full)", "full", worktree))
+
+    print(f"{args.tasks} tasks, {args.rounds} toggles each")
+    try:
+        for label, mode, root in variants:
+            median, best = measure(mode, root, args)
+            print(f"{label:>24}: median {median:8.1f} ms  best {best:8.1f} ms")
+    finally:
+        if worktree:
+            subprocess.run(["git", "-C", ROOT, "worktree", "remove", "--force", worktree], capture_output=True)
+            shutil.rmtree(worktree, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,61 @@
+"""
+Times exports.write_grouped_text on 10k to 1M generated tasks.
+
+Text goes both to a BytesIO and to a temporary file. Time per task should
+stay flat as the count grows; a quadratic writer shows up as a rising
+ns/task column.
+
+Usage: python benchmarks/bench_txt.py [task_count ...]
+"""
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import exports
+
+TASKS_PER_GROUP = 25
+
+
+def generate_tasks(task_count):
+    """Yield task rows shaped like db.iter_tasks output, without touching a database."""
+    for i in range(task_count):
+        group = i // TASKS_PER_GROUP
+        yield {
+            'timeframe_label': f"Week {group + 1} - Focus area {group % 7}",
+            'title': f"Work through exercise {i} and write down what was learned",
+            'is_done': i % 3 == 0,
+        }
+
+
+def time_write(task_count, make_sink):
+    best = None
+    for _ in range(3):
+        with make_sink() as sink:
+            start = time.perf_counter()
+            exports.write_grouped_text(generate_tasks(task_count), sink, header="Roadmap: bench\n\n")
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv):
+    counts = [int(arg) for arg in argv] or [10_000, 100_000, 250_000, 500_000, 1_000_000]
+    sinks = {
+        "BytesIO": io.BytesIO,
+        "file": lambda: tempfile.TemporaryFile(),
+    }
+    print(f"{'tasks':>10}  " + "  ".join(f"{name:>10} {'ns/task':>8}" for name in sinks))
+    for count in counts:
+        cells = []
+        for make_sink in sinks.values():
+            seconds = time_write(count, make_sink)
+            cells.append(f"{seconds:9.3f}s {seconds / count * 1e9:8.0f}")
+        print(f"{count:>10}  " + "  ".join(cells))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,148 @@
+"""
+Hammers db.py with concurrent reads and writes from many threads.
+
+One thread keeps a long import-sized write transaction open while reader
+threads load tasks and writer threads toggle checkboxes, half of them
+directly and half through the write-behind queue (whose timer flushes then
+wait on the long transaction). Fails (exit code 1) if any operation hits
+"database is locked", if reads stall behind the writer, or if the progress
+counters disagree with the task rows at the end.
+
+Usage: python benchmarks/stress_concurrency.py [--threads N] [--seconds S]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+import parser
+
+# A read slower than this while the writer holds its lock counts as blocked
+MAX_READ_SECONDS = 0.5
+# How long the long transaction holds the write lock; longer than the above
+# so a read that waits for it is caught
+WRITE_HOLD_SECONDS = 1.0
+
+
+def main(argv):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--threads", type=int, default=16)
+    arg_parser.add_argument("--seconds", type=float, default=5.0)
+    args = arg_parser.parse_args(argv)
+
+    db.DB_FILE = os.path.join(tempfile.mkdtemp(), "stress.db")
+    db.init_db()
+    text = "\n".join(f"Week {w}\n" + "\n".join(f"- Task {w}.{t}" for t in range(50)) for w in range(1, 21))
+    roadmap_id, _, _ = db.bulk_import_roadmap("stress", text, parser.parse_roadmap(text))
+    tasks = db.get_tasks(roadmap_id)
+    task_ids = [task['id'] for task in tasks]
+
+    stop = threading.Event()
+    errors = []
+    read_times = []
+    counts = {"reads": 0, "writes": 0, "toggles": 0, "imports": 0}
+    lock = threading.Lock()
+
+    def record_error(e):
+        with lock:
+            errors.append(repr(e))
+
+    def reader():
+        while not stop.is_set():
+            try:
+                start = time.perf_counter()
+                db.get_tasks(roadmap_id)
+                elapsed = time.perf_counter() - start
+                with lock:
+                    read_times.append(elapsed)
+                    counts["reads"] += 1
+            except sqlite3.Error as e:
+                record_error(e)
+
+    def writer(offset):
+        i = offset
+        while not stop.is_set():
+            try:
+                db.update_task_status(task_ids[i % len(task_ids)], i % 2)
+                with lock:
+                    counts["writes"] += 1
+            except sqlite3.Error as e:
+                record_error(e)
+            i += 7
+
+    def toggler(offset):
+        # Checkbox clicks as the task list makes them
+        i = offset
+        while not stop.is_set():
+            try:
+                start = time.perf_counter()
+                db.queue_task_status(tasks[i % len(tasks)], i % 2)
+                elapsed = time.perf_counter() - start
+                with lock:
+                    read_times.append(elapsed)
+                    counts["toggles"] += 1
+            except sqlite3.Error as e:
+                record_error(e)
+            i += 11
+            time.sleep(0.01)
+
+    def long_importer():
+        # Holds the write lock for a while, like a large import would
+        n = 0
+        while not stop.is_set():
+            try:
+                with db.transaction() as c:
+                    c.execute("INSERT INTO roadmaps (name, raw_text, created_at) VALUES (?, ?, ?)",
+                              (f"bulk {n}", "", ""))
+                    time.sleep(WRITE_HOLD_SECONDS)
+                n += 1
+                with lock:
+                    counts["imports"] += 1
+            except sqlite3.Error as e:
+                record_error(e)
+
+    threads = [threading.Thread(target=long_importer)]
+    for k in range(args.threads):
+        if k % 4 == 1:
+            threads.append(threading.Thread(target=writer, args=(k,)))
+        elif k % 4 == 3:
+            threads.append(threading.Thread(target=toggler, args=(k,)))
+        else:
+            threads.append(threading.Thread(target=reader))
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    db.flush_task_updates()
+
+    slowest = max(read_times) if read_times else 0.0
+    progress = db.get_progress(roadmap_id)
+    done = sum(task['is_done'] for task in db.get_tasks(roadmap_id))
+    print(f"reads={counts['reads']} writes={counts['writes']} toggles={counts['toggles']} "
+          f"long transactions={counts['imports']} slowest read={slowest * 1000:.1f}ms errors={len(errors)}")
+    for error in errors[:10]:
+        print("  ", error)
+
+    if errors:
+        print("FAIL: lock errors")
+        return 1
+    if slowest > MAX_READ_SECONDS:
+        print("FAIL: reads were blocked by the writer")
+        return 1
+    if progress['done'] != done:
+        print(f"FAIL: progress counter says {progress['done']} done, task rows say {done}")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
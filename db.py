@@ -1,17 +1,141 @@
 import sqlite3
+import atexit
+import difflib
+import re
+import threading
+import unicodedata
+from contextlib import contextmanager
 from datetime import datetime
 
 DB_FILE = "roadmap.db"
 
+# Rows per executemany batch when importing
+IMPORT_BATCH_SIZE = 1000
+
+# Rows per query when streaming tasks with iter_tasks
+TASK_BATCH_SIZE = 1000
+
+# How alike (difflib ratio) a changed line must be to its old version to count
+# as a rewording that keeps the row, and how far ahead to look for one
+REWORD_SIMILARITY = 0.6
+REWORD_LOOKAHEAD = 8
+
+# Position of the "Unassigned" timeframe; its tasks come before every heading
+UNASSIGNED_POSITION = -1e18
+
+# Idle connections kept open per database file
+POOL_SIZE = 8
+
+# Prepared statements cached per connection
+STATEMENT_CACHE_SIZE = 256
+
+# Pragmas applied to every new connection, in order. Adjust before the first
+# connection is opened (e.g. from a deployment script); pooled connections keep
+# the settings they were opened with.
+DB_PRAGMAS = {
+    # Readers never block the writer and the writer never blocks readers
+    "journal_mode": "WAL",
+    # Durable across app crashes in WAL mode; only a power loss can drop the last commits
+    "synchronous": "NORMAL",
+    # Milliseconds a writer waits for the lock before failing with "database is locked"
+    "busy_timeout": 10000,
+    # Page cache per connection; negative values are KiB (16 MB)
+    "cache_size": -16000,
+    # Read through a memory map instead of read() calls (64 MB)
+    "mmap_size": 64 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
+# Newest matches search_tasks ranks; more matches than this are never looked at
+SEARCH_CANDIDATES = 500
+
+# Seconds a checkbox toggle may wait in memory before it is written
+TASK_FLUSH_DELAY = 0.5
+
+_pool = {}  # db file -> idle connections
+_pool_lock = threading.Lock()
+
+# Write-behind queue for checkbox toggles: task id -> pending change
+_pending_status = {}
+# Toggles a flush has taken off the queue and is writing; reads still overlay them
+_inflight_status = {}
+_pending_lock = threading.Lock()
+# Held for a whole flush, so only one batch of toggles is in flight at a time
+_flush_lock = threading.Lock()
+_flush_timer = None
+
 def get_connection():
-    conn = sqlite3.connect(DB_FILE)
+    """
+    Open a new connection to DB_FILE.
+
+    Connections run in autocommit mode; writes go through transaction(), which
+    opens an explicit transaction. They may be used from any thread, but by
+    one thread at a time, which the pool guarantees.
+    """
+    busy_timeout = DB_PRAGMAS.get("busy_timeout", 5000)
+    conn = sqlite3.connect(DB_FILE, timeout=busy_timeout / 1000, isolation_level=None,
+                           check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
     conn.row_factory = sqlite3.Row
+    for pragma, value in DB_PRAGMAS.items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
     return conn
 
-def init_db():
-    conn = get_connection()
-    c = conn.cursor()
-    
+@contextmanager
+def connection():
+    """Borrow a pooled connection for the duration of the block."""
+    db_file = DB_FILE
+    with _pool_lock:
+        idle = _pool.get(db_file)
+        conn = idle.pop() if idle else None
+    if conn is None:
+        conn = get_connection()
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        with _pool_lock:
+            idle = _pool.setdefault(db_file, [])
+            if len(idle) < POOL_SIZE:
+                idle.append(conn)
+                conn = None
+        if conn is not None:
+            conn.close()
+
+@contextmanager
+def transaction():
+    """
+    Run the block in a single write transaction and yield its cursor.
+
+    Commits when the block finishes and rolls back if it raises. The write lock
+    is taken up front (BEGIN IMMEDIATE) so reads inside the block can't go stale.
+    """
+    with connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn.cursor()
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+def close_connections():
+    """Close every idle pooled connection, e.g. before the database file is replaced."""
+    with _pool_lock:
+        idle = [conn for conns in _pool.values() for conn in conns]
+        _pool.clear()
+    for conn in idle:
+        conn.close()
+
+def _fetch_all(query, params=()):
+    with connection() as conn:
+        return [dict(row) for row in conn.execute(query, params)]
+
+# Schema migrations. Each one runs once, in order, inside its own transaction;
+# PRAGMA user_version records how many have been applied to a database.
+# Never edit a shipped migration, append a new one instead.
+
+def _migration_base_schema(c):
     # Roadmaps Table
     c.execute('''CREATE TABLE IF NOT EXISTS roadmaps (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -27,6 +151,7 @@ def init_db():
                     label TEXT NOT NULL,
                     granularity TEXT NOT NULL,
                     parent_id INTEGER,
+                    position REAL,
                     FOREIGN KEY(roadmap_id) REFERENCES roadmaps(id),
                     FOREIGN KEY(parent_id) REFERENCES timeframes(id)
                 )''')
@@ -39,54 +164,452 @@ def init_db():
                     details TEXT,
                     is_done BOOLEAN DEFAULT 0,
                     created_at TEXT,
+                    position REAL,
                     FOREIGN KEY(timeframe_id) REFERENCES timeframes(id)
                 )''')
     
-    conn.commit()
-    conn.close()
+    # Parse results keyed by text hash + grammar version (disk tier of parser.ParseCache)
+    c.execute('''CREATE TABLE IF NOT EXISTS parse_cache (
+                    key TEXT PRIMARY KEY,
+                    items TEXT NOT NULL,
+                    created_at TEXT
+                )''')
+    
+    # Older databases predate the position column that keeps rows in text order
+    for table in ("timeframes", "tasks"):
+        columns = [row['name'] for row in c.execute(f"PRAGMA table_info({table})")]
+        if 'position' not in columns:
+            c.execute(f"ALTER TABLE {table} ADD COLUMN position REAL")
+            # Rows were written in text order, so their ids order them
+            c.execute(f"UPDATE {table} SET position = id")
+    c.execute("UPDATE timeframes SET position = NULL WHERE granularity = 'generic'")
+
+def _migration_indexes(c):
+    # Timeframes of a roadmap in text order, optionally narrowed to a granularity.
+    # They also cover the "SELECT id FROM timeframes WHERE roadmap_id = ?" subqueries.
+    c.execute("CREATE INDEX IF NOT EXISTS idx_timeframes_roadmap ON timeframes(roadmap_id, position)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_timeframes_roadmap_granularity ON timeframes(roadmap_id, granularity, position)")
+
+    # Tasks are always reached through their timeframe
+    c.execute("CREATE INDEX IF NOT EXISTS idx_tasks_timeframe ON tasks(timeframe_id, position)")
+
+    c.execute("CREATE INDEX IF NOT EXISTS idx_roadmaps_created_at ON roadmaps(created_at)")
+
+    # Names are unique regardless of case; rename existing duplicates so the index can be built
+    taken = set()
+    for row in c.execute("SELECT id, name FROM roadmaps ORDER BY id").fetchall():
+        name = (row['name'] or "Untitled Roadmap").strip() or "Untitled Roadmap"
+        candidate = name
+        suffix = 2
+        while candidate.lower() in taken:
+            candidate = f"{name} ({suffix})"
+            suffix += 1
+        taken.add(candidate.lower())
+        if candidate != row['name']:
+            c.execute("UPDATE roadmaps SET name = ? WHERE id = ?", (candidate, row['id']))
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_roadmaps_name ON roadmaps(name COLLATE NOCASE)")
+
+def _migration_progress_counters(c):
+    # total/done task counters per roadmap and per timeframe, kept current by triggers.
+    # Roadmap counters get their own small table: bumping them on the roadmaps
+    # row would rewrite its (possibly huge) raw_text on every task change.
+    c.execute("ALTER TABLE timeframes ADD COLUMN task_count INTEGER NOT NULL DEFAULT 0")
+    c.execute("ALTER TABLE timeframes ADD COLUMN done_count INTEGER NOT NULL DEFAULT 0")
+    c.execute('''CREATE TABLE IF NOT EXISTS roadmap_progress (
+                    roadmap_id INTEGER PRIMARY KEY,
+                    task_count INTEGER NOT NULL DEFAULT 0,
+                    done_count INTEGER NOT NULL DEFAULT 0,
+                    FOREIGN KEY(roadmap_id) REFERENCES roadmaps(id)
+                )''')
+
+    c.execute('''UPDATE timeframes SET
+                    task_count = (SELECT COUNT(*) FROM tasks WHERE timeframe_id = timeframes.id),
+                    done_count = (SELECT COUNT(*) FROM tasks WHERE timeframe_id = timeframes.id AND is_done)''')
+    c.execute('''INSERT INTO roadmap_progress (roadmap_id, task_count, done_count)
+                 SELECT r.id, COALESCE(SUM(tf.task_count), 0), COALESCE(SUM(tf.done_count), 0)
+                 FROM roadmaps r LEFT JOIN timeframes tf ON tf.roadmap_id = r.id
+                 GROUP BY r.id''')
+
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_roadmaps_progress_insert AFTER INSERT ON roadmaps
+                 BEGIN
+                    INSERT INTO roadmap_progress (roadmap_id) VALUES (NEW.id);
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_roadmaps_progress_delete AFTER DELETE ON roadmaps
+                 BEGIN
+                    DELETE FROM roadmap_progress WHERE roadmap_id = OLD.id;
+                 END''')
+
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_tasks_progress_insert AFTER INSERT ON tasks
+                 BEGIN
+                    UPDATE timeframes SET task_count = task_count + 1,
+                                          done_count = done_count + (CASE WHEN NEW.is_done THEN 1 ELSE 0 END)
+                        WHERE id = NEW.timeframe_id;
+                    UPDATE roadmap_progress SET task_count = task_count + 1,
+                                                done_count = done_count + (CASE WHEN NEW.is_done THEN 1 ELSE 0 END)
+                        WHERE roadmap_id = (SELECT roadmap_id FROM timeframes WHERE id = NEW.timeframe_id);
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_tasks_progress_delete AFTER DELETE ON tasks
+                 BEGIN
+                    UPDATE timeframes SET task_count = task_count - 1,
+                                          done_count = done_count - (CASE WHEN OLD.is_done THEN 1 ELSE 0 END)
+                        WHERE id = OLD.timeframe_id;
+                    UPDATE roadmap_progress SET task_count = task_count - 1,
+                                                done_count = done_count - (CASE WHEN OLD.is_done THEN 1 ELSE 0 END)
+                        WHERE roadmap_id = (SELECT roadmap_id FROM timeframes WHERE id = OLD.timeframe_id);
+                 END''')
+    # Covers checkbox toggles and tasks moved to another timeframe by update_roadmap_content
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_tasks_progress_update AFTER UPDATE OF is_done, timeframe_id ON tasks
+                 WHEN OLD.is_done IS NOT NEW.is_done OR OLD.timeframe_id IS NOT NEW.timeframe_id
+                 BEGIN
+                    UPDATE timeframes SET task_count = task_count - 1,
+                                          done_count = done_count - (CASE WHEN OLD.is_done THEN 1 ELSE 0 END)
+                        WHERE id = OLD.timeframe_id;
+                    UPDATE roadmap_progress SET task_count = task_count - 1,
+                                                done_count = done_count - (CASE WHEN OLD.is_done THEN 1 ELSE 0 END)
+                        WHERE roadmap_id = (SELECT roadmap_id FROM timeframes WHERE id = OLD.timeframe_id);
+                    UPDATE timeframes SET task_count = task_count + 1,
+                                          done_count = done_count + (CASE WHEN NEW.is_done THEN 1 ELSE 0 END)
+                        WHERE id = NEW.timeframe_id;
+                    UPDATE roadmap_progress SET task_count = task_count + 1,
+                                                done_count = done_count + (CASE WHEN NEW.is_done THEN 1 ELSE 0 END)
+                        WHERE roadmap_id = (SELECT roadmap_id FROM timeframes WHERE id = NEW.timeframe_id);
+                 END''')
+
+def _migration_unassigned_position(c):
+    # Keyset paging compares positions, so "Unassigned" needs a real one instead of NULL
+    c.execute("UPDATE timeframes SET position = ? WHERE granularity = 'generic'", (UNASSIGNED_POSITION,))
+
+def _migration_revisions(c):
+    # roadmap_progress.revision goes up whenever anything an export shows
+    # changes, so cached exports can be keyed on it. The task triggers fold the
+    # bump into the counter update they already make.
+    c.execute("ALTER TABLE roadmap_progress ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+
+    c.execute("DROP TRIGGER IF EXISTS trg_tasks_progress_insert")
+    c.execute("DROP TRIGGER IF EXISTS trg_tasks_progress_delete")
+    c.execute("DROP TRIGGER IF EXISTS trg_tasks_progress_update")
+    c.execute('''CREATE TRIGGER trg_tasks_progress_insert AFTER INSERT ON tasks
+                 BEGIN
+                    UPDATE timeframes SET task_count = task_count + 1,
+                                          done_count = done_count + (CASE WHEN NEW.is_done THEN 1 ELSE 0 END)
+                        WHERE id = NEW.timeframe_id;
+                    UPDATE roadmap_progress SET task_count = task_count + 1,
+                                                done_count = done_count + (CASE WHEN NEW.is_done THEN 1 ELSE 0 END),
+                                                revision = revision + 1
+                        WHERE roadmap_id = (SELECT roadmap_id FROM timeframes WHERE id = NEW.timeframe_id);
+                 END''')
+    c.execute('''CREATE TRIGGER trg_tasks_progress_delete AFTER DELETE ON tasks
+                 BEGIN
+                    UPDATE timeframes SET task_count = task_count - 1,
+                                          done_count = done_count - (CASE WHEN OLD.is_done THEN 1 ELSE 0 END)
+                        WHERE id = OLD.timeframe_id;
+                    UPDATE roadmap_progress SET task_count = task_count - 1,
+                                                done_count = done_count - (CASE WHEN OLD.is_done THEN 1 ELSE 0 END),
+                                                revision = revision + 1
+                        WHERE roadmap_id = (SELECT roadmap_id FROM timeframes WHERE id = OLD.timeframe_id);
+                 END''')
+    c.execute('''CREATE TRIGGER trg_tasks_progress_update AFTER UPDATE OF is_done, timeframe_id ON tasks
+                 WHEN OLD.is_done IS NOT NEW.is_done OR OLD.timeframe_id IS NOT NEW.timeframe_id
+                 BEGIN
+                    UPDATE timeframes SET task_count = task_count - 1,
+                                          done_count = done_count - (CASE WHEN OLD.is_done THEN 1 ELSE 0 END)
+                        WHERE id = OLD.timeframe_id;
+                    UPDATE roadmap_progress SET task_count = task_count - 1,
+                                                done_count = done_count - (CASE WHEN OLD.is_done THEN 1 ELSE 0 END),
+                                                revision = revision + 1
+                        WHERE roadmap_id = (SELECT roadmap_id FROM timeframes WHERE id = OLD.timeframe_id);
+                    UPDATE timeframes SET task_count = task_count + 1,
+                                          done_count = done_count + (CASE WHEN NEW.is_done THEN 1 ELSE 0 END)
+                        WHERE id = NEW.timeframe_id;
+                    UPDATE roadmap_progress SET task_count = task_count + 1,
+                                                done_count = done_count + (CASE WHEN NEW.is_done THEN 1 ELSE 0 END)
+                        WHERE roadmap_id = (SELECT roadmap_id FROM timeframes WHERE id = NEW.timeframe_id);
+                 END''')
+
+    # Edits that change what an export prints without touching the counters
+    c.execute('''CREATE TRIGGER trg_tasks_revision_update AFTER UPDATE OF title, position ON tasks
+                 WHEN OLD.title IS NOT NEW.title OR OLD.position IS NOT NEW.position
+                 BEGIN
+                    UPDATE roadmap_progress SET revision = revision + 1
+                        WHERE roadmap_id = (SELECT roadmap_id FROM timeframes WHERE id = NEW.timeframe_id);
+                 END''')
+    c.execute('''CREATE TRIGGER trg_timeframes_revision_update AFTER UPDATE OF label, position ON timeframes
+                 WHEN OLD.label IS NOT NEW.label OR OLD.position IS NOT NEW.position
+                 BEGIN
+                    UPDATE roadmap_progress SET revision = revision + 1 WHERE roadmap_id = NEW.roadmap_id;
+                 END''')
+    c.execute('''CREATE TRIGGER trg_roadmaps_revision_update AFTER UPDATE OF name ON roadmaps
+                 WHEN OLD.name IS NOT NEW.name
+                 BEGIN
+                    UPDATE roadmap_progress SET revision = revision + 1 WHERE roadmap_id = NEW.id;
+                 END''')
+
+def _migration_task_search(c):
+    # Full-text index over task titles, with the timeframe label as context.
+    # rowid is the task id; triggers keep it in step with every write path.
+    try:
+        c.execute('''CREATE VIRTUAL TABLE task_search USING fts5(
+                        title, timeframe_label,
+                        tokenize = 'unicode61 remove_diacritics 2',
+                        prefix = '2 3'
+                    )''')
+    except sqlite3.OperationalError as e:
+        # SQLite built without FTS5; search_tasks falls back to LIKE
+        print(f"Full-text search unavailable: {e}")
+        return
+    c.execute('''INSERT INTO task_search (rowid, title, timeframe_label)
+                 SELECT t.id, t.title, tf.label FROM tasks t JOIN timeframes tf ON tf.id = t.timeframe_id''')
+    # Holds a row while a bulk insert indexes its tasks in one statement instead (see _bulk_insert_items)
+    c.execute("CREATE TABLE task_search_paused (roadmap_id INTEGER)")
+
+    c.execute('''CREATE TRIGGER trg_tasks_search_insert AFTER INSERT ON tasks
+                 WHEN NOT EXISTS (SELECT 1 FROM task_search_paused)
+                 BEGIN
+                    INSERT INTO task_search (rowid, title, timeframe_label)
+                        SELECT NEW.id, NEW.title, label FROM timeframes WHERE id = NEW.timeframe_id;
+                 END''')
+    c.execute('''CREATE TRIGGER trg_tasks_search_delete AFTER DELETE ON tasks
+                 BEGIN
+                    DELETE FROM task_search WHERE rowid = OLD.id;
+                 END''')
+    c.execute('''CREATE TRIGGER trg_tasks_search_update AFTER UPDATE OF title, timeframe_id ON tasks
+                 WHEN OLD.title IS NOT NEW.title OR OLD.timeframe_id IS NOT NEW.timeframe_id
+                 BEGIN
+                    UPDATE task_search SET title = NEW.title,
+                                           timeframe_label = (SELECT label FROM timeframes WHERE id = NEW.timeframe_id)
+                        WHERE rowid = NEW.id;
+                 END''')
+    c.execute('''CREATE TRIGGER trg_timeframes_search_update AFTER UPDATE OF label ON timeframes
+                 WHEN OLD.label IS NOT NEW.label
+                 BEGIN
+                    UPDATE task_search SET timeframe_label = NEW.label
+                        WHERE rowid IN (SELECT id FROM tasks WHERE timeframe_id = NEW.id);
+                 END''')
+
+def _migration_timeframe_paths(c):
+    # Closure table of the timeframe hierarchy: one row per (ancestor, descendant)
+    # pair, including each timeframe with itself at depth 0, so a whole subtree
+    # is a single index range on ancestor_id.
+    c.execute('''CREATE TABLE timeframe_paths (
+                    ancestor_id INTEGER NOT NULL,
+                    descendant_id INTEGER NOT NULL,
+                    depth INTEGER NOT NULL,
+                    PRIMARY KEY (ancestor_id, descendant_id)
+                ) WITHOUT ROWID''')
+    c.execute("CREATE INDEX idx_timeframe_paths_descendant ON timeframe_paths(descendant_id, ancestor_id)")
+
+    # Depth cap guards against a parent cycle in hand-edited data
+    c.execute('''WITH RECURSIVE paths(ancestor_id, descendant_id, depth) AS (
+                    SELECT id, id, 0 FROM timeframes
+                    UNION ALL
+                    SELECT p.ancestor_id, tf.id, p.depth + 1
+                    FROM paths p JOIN timeframes tf ON tf.parent_id = p.descendant_id
+                    WHERE p.depth < 32
+                 )
+                 INSERT OR IGNORE INTO timeframe_paths (ancestor_id, descendant_id, depth)
+                 SELECT ancestor_id, descendant_id, depth FROM paths''')
+
+    # A parent is always written before its children (it comes first in the text)
+    c.execute('''CREATE TRIGGER trg_timeframes_paths_insert AFTER INSERT ON timeframes
+                 BEGIN
+                    INSERT INTO timeframe_paths (ancestor_id, descendant_id, depth) VALUES (NEW.id, NEW.id, 0);
+                    INSERT INTO timeframe_paths (ancestor_id, descendant_id, depth)
+                        SELECT ancestor_id, NEW.id, depth + 1 FROM timeframe_paths WHERE descendant_id = NEW.parent_id;
+                 END''')
+    c.execute('''CREATE TRIGGER trg_timeframes_paths_delete AFTER DELETE ON timeframes
+                 BEGIN
+                    DELETE FROM timeframe_paths WHERE descendant_id = OLD.id;
+                    DELETE FROM timeframe_paths WHERE ancestor_id = OLD.id;
+                 END''')
+    # Re-parenting moves the whole subtree: drop its paths to the old
+    # ancestors, then link it under every ancestor of the new parent
+    c.execute('''CREATE TRIGGER trg_timeframes_paths_move AFTER UPDATE OF parent_id ON timeframes
+                 WHEN OLD.parent_id IS NOT NEW.parent_id
+                 BEGIN
+                    DELETE FROM timeframe_paths
+                        WHERE descendant_id IN (SELECT descendant_id FROM timeframe_paths WHERE ancestor_id = NEW.id)
+                          AND ancestor_id NOT IN (SELECT descendant_id FROM timeframe_paths WHERE ancestor_id = NEW.id);
+                    INSERT INTO timeframe_paths (ancestor_id, descendant_id, depth)
+                        SELECT up.ancestor_id, down.descendant_id, up.depth + down.depth + 1
+                        FROM timeframe_paths up, timeframe_paths down
+                        WHERE up.descendant_id = NEW.parent_id AND down.ancestor_id = NEW.id;
+                 END''')
+
+def _migration_roadmap_summary_index(c):
+    # Covers the roadmap list (id, name, created_at). created_at is stored after
+    # raw_text, so reading it from the table walks every overflow page of the text.
+    c.execute("CREATE INDEX idx_roadmaps_summary ON roadmaps(created_at, name)")
+    c.execute("DROP INDEX IF EXISTS idx_roadmaps_created_at")
+
+def _migration_drop_parse_cache(c):
+    # The on-disk parse cache is gone: reading a result back was no faster
+    # than parsing the text again
+    c.execute("DROP TABLE IF EXISTS parse_cache")
+
+MIGRATIONS = [
+    _migration_base_schema,
+    _migration_indexes,
+    _migration_progress_counters,
+    _migration_unassigned_position,
+    _migration_revisions,
+    _migration_task_search,
+    _migration_timeframe_paths,
+    _migration_roadmap_summary_index,
+    _migration_drop_parse_cache,
+]
+
+def init_db():
+    """Create the database or upgrade an existing one in place by running pending migrations."""
+    with connection() as conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        with transaction() as c:
+            # Another process may have migrated while we waited for the write lock
+            if c.execute("PRAGMA user_version").fetchone()[0] >= number:
+                continue
+            migration(c)
+            c.execute(f"PRAGMA user_version = {number}")
 
 def save_roadmap(name, raw_text):
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("INSERT INTO roadmaps (name, raw_text, created_at) VALUES (?, ?, ?)", 
-              (name, raw_text, datetime.now().isoformat()))
-    roadmap_id = c.lastrowid
-    conn.commit()
-    conn.close()
-    return roadmap_id
-
-def save_timeframe(roadmap_id, label, granularity, parent_id=None):
-    conn = get_connection()
-    c = conn.cursor()
+    with transaction() as c:
+        c.execute("INSERT INTO roadmaps (name, raw_text, created_at) VALUES (?, ?, ?)", 
+                  (name, raw_text, datetime.now().isoformat()))
+        return c.lastrowid
+
+def save_timeframe(roadmap_id, label, granularity, parent_id=None, position=None):
     # Check if exists to avoid duplicates if re-parsing (simple check)
     # For now, we assume fresh import or we just insert. 
     # Let's just insert for simplicity as per requirements.
-    c.execute("INSERT INTO timeframes (roadmap_id, label, granularity, parent_id) VALUES (?, ?, ?, ?)",
-              (roadmap_id, label, granularity, parent_id))
-    tf_id = c.lastrowid
-    conn.commit()
-    conn.close()
-    return tf_id
-
-def save_task(timeframe_id, title, details=""):
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("INSERT INTO tasks (timeframe_id, title, details, created_at) VALUES (?, ?, ?, ?)",
-              (timeframe_id, title, details, datetime.now().isoformat()))
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute("INSERT INTO timeframes (roadmap_id, label, granularity, parent_id, position) VALUES (?, ?, ?, ?, ?)",
+                  (roadmap_id, label, granularity, parent_id, position))
+        return c.lastrowid
+
+def save_task(timeframe_id, title, details="", position=None):
+    with transaction() as c:
+        c.execute("INSERT INTO tasks (timeframe_id, title, details, created_at, position) VALUES (?, ?, ?, ?, ?)",
+                  (timeframe_id, title, details, datetime.now().isoformat(), position))
+
+def _next_id(c, table):
+    """First unused AUTOINCREMENT id of a table (call while holding the write lock)."""
+    c.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+    row = c.fetchone()
+    seq = row[0] if row else 0
+    c.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+    return max(seq, c.fetchone()[0]) + 1
+
+def _bulk_insert_items(c, roadmap_id, items):
+    """
+    Insert the timeframes and tasks of a parsed roadmap with batched executemany.
+
+    Timeframe ids are assigned up front so tasks can point at their timeframe
+    without a round trip per row, which is why the caller must hold the write
+    lock (BEGIN IMMEDIATE). items may be any iterable, e.g. parser.iter_parse.
+    Returns (timeframe_count, task_count); "Unassigned" isn't counted.
+    """
+    next_tf_id = _next_id(c, "timeframes")
+    now = datetime.now().isoformat()
+    # Indexing tasks for search row by row from the trigger costs several times
+    # the import itself; pause it and index them all at once at the end. The
+    # pause row never outlives this transaction, so other writers can't see it.
+    search_index = c.execute("SELECT 1 FROM sqlite_master WHERE name = 'task_search_paused'").fetchone()
+    if search_index:
+        c.execute("INSERT INTO task_search_paused (roadmap_id) VALUES (?)", (roadmap_id,))
+        first_task_id = _next_id(c, "tasks")
+    tf_ids = []  # timeframe index (from the parser) -> row id
+    unassigned_id = None
+    tf_batch = []
+    task_batch = []
+    count_tf = 0
+    count_tasks = 0
+
+    def flush():
+        # Timeframes first, so every task's timeframe exists when it lands
+        c.executemany("INSERT INTO timeframes (id, roadmap_id, label, granularity, parent_id, position) VALUES (?, ?, ?, ?, ?, ?)",
+                      tf_batch)
+        c.executemany("INSERT INTO tasks (timeframe_id, title, created_at, position) VALUES (?, ?, ?, ?)",
+                      task_batch)
+        tf_batch.clear()
+        task_batch.clear()
+
+    for position, item in enumerate(items):
+        if item['type'] == 'timeframe':
+            tf_id = next_tf_id
+            next_tf_id += 1
+            parent_index = item['parent_index']
+            tf_batch.append((tf_id, roadmap_id, item['label'], item['granularity'],
+                             tf_ids[parent_index] if parent_index is not None else None, position))
+            tf_ids.append(tf_id)
+            count_tf += 1
+        else:
+            tf_index = item['timeframe_index']
+            if tf_index is not None:
+                tf_id = tf_ids[tf_index]
+            else:
+                if unassigned_id is None:
+                    unassigned_id = next_tf_id
+                    next_tf_id += 1
+                    tf_batch.append((unassigned_id, roadmap_id, "Unassigned", "generic", None, UNASSIGNED_POSITION))
+                tf_id = unassigned_id
+            task_batch.append((tf_id, item['title'], now, position))
+            count_tasks += 1
+
+        if len(tf_batch) + len(task_batch) >= IMPORT_BATCH_SIZE:
+            flush()
+    flush()
+
+    if search_index:
+        c.execute('''INSERT INTO task_search (rowid, title, timeframe_label)
+                     SELECT t.id, t.title, tf.label FROM timeframes tf JOIN tasks t ON t.timeframe_id = tf.id
+                     WHERE tf.roadmap_id = ? AND t.id >= ?''', (roadmap_id, first_task_id))
+        c.execute("DELETE FROM task_search_paused WHERE roadmap_id = ?", (roadmap_id,))
+    return count_tf, count_tasks
+
+def bulk_import_roadmap(name, raw_text, parsed_items):
+    """
+    Import a roadmap with all of its timeframes and tasks in one transaction.
+
+    Either the whole roadmap is written or nothing is, so a failure can't leave
+    a half-populated roadmap behind.
+    Returns (roadmap_id, timeframe_count, task_count), or None on failure.
+    """
+    try:
+        with transaction() as c:
+            c.execute("INSERT INTO roadmaps (name, raw_text, created_at) VALUES (?, ?, ?)",
+                      (name, raw_text, datetime.now().isoformat()))
+            roadmap_id = c.lastrowid
+            count_tf, count_tasks = _bulk_insert_items(c, roadmap_id, parsed_items)
+        return roadmap_id, count_tf, count_tasks
+    except Exception as e:
+        print(f"Error importing roadmap: {e}")
+        return None
 
 def get_roadmaps():
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("SELECT * FROM roadmaps ORDER BY created_at DESC")
-    res = [dict(row) for row in c.fetchall()]
-    conn.close()
-    return res
+    return _fetch_all("SELECT * FROM roadmaps ORDER BY created_at DESC")
+
+def get_roadmap_summaries():
+    """id, name and created_at of every roadmap, newest first, without loading raw_text."""
+    return _fetch_all("SELECT id, name, created_at FROM roadmaps ORDER BY created_at DESC")
+
+def get_roadmap_text(roadmap_id):
+    """The raw text of one roadmap, or "" when it has none."""
+    with connection() as conn:
+        row = conn.execute("SELECT raw_text FROM roadmaps WHERE id = ?", (roadmap_id,)).fetchone()
+    return (row['raw_text'] if row else None) or ""
+
+def roadmap_name_exists(name, exclude_id=None):
+    """
+    Whether a roadmap other than exclude_id is already called name, ignoring case.
+
+    Answered from the unique idx_roadmaps_name index, so no roadmap rows are read.
+    """
+    with connection() as conn:
+        row = conn.execute("SELECT EXISTS (SELECT 1 FROM roadmaps WHERE name = ? COLLATE NOCASE AND id IS NOT ?)",
+                           (name, exclude_id)).fetchone()
+    return bool(row[0])
 
 def get_timeframes(roadmap_id, granularity=None):
-    conn = get_connection()
-    c = conn.cursor()
     query = "SELECT * FROM timeframes WHERE roadmap_id = ?"
     params = [roadmap_id]
     
@@ -94,125 +617,647 @@ def get_timeframes(roadmap_id, granularity=None):
         query += " AND granularity = ?"
         params.append(granularity.lower())
         
-    c.execute(query, params)
-    res = [dict(row) for row in c.fetchall()]
-    conn.close()
+    query += " ORDER BY position, id"
+    pending = _pending_snapshot()
+    res = _fetch_all(query, params)
+    if pending:
+        # Count toggles that are still waiting to be written
+        by_id = {tf['id']: tf for tf in res}
+        for change in pending.values():
+            tf = by_id.get(change['timeframe_id'])
+            if tf is not None:
+                tf['done_count'] += change['is_done'] - change['committed']
     return res
 
-def get_tasks(roadmap_id, timeframe_id=None):
-    conn = get_connection()
-    c = conn.cursor()
-    
+def get_progress(roadmap_id):
+    """Task totals of a roadmap as {'total': n, 'done': n}, read from the trigger-maintained counters."""
+    pending = _pending_snapshot()
+    with connection() as conn:
+        row = conn.execute("SELECT task_count, done_count FROM roadmap_progress WHERE roadmap_id = ?",
+                           (roadmap_id,)).fetchone()
+    if row is None:
+        return {"total": 0, "done": 0}
+    done = row['done_count']
+    for change in pending.values():
+        if change['roadmap_id'] == roadmap_id:
+            done += change['is_done'] - change['committed']
+    return {"total": row['task_count'], "done": done}
+
+def get_tasks(roadmap_id, timeframe_id=None, after=None, limit=None, subtree_of=None):
+    """
+    Fetch tasks of a roadmap in text order (by timeframe, then task).
+
+    timeframe_id keeps only the tasks directly under that timeframe;
+    subtree_of keeps the tasks of a timeframe and of everything nested in it
+    (a month with its weeks, days and hours). Each row also carries its
+    timeframe's counters as timeframe_task_count and timeframe_done_count.
+
+    For keyset pagination pass limit, then the (timeframe_id, id) of the last
+    task of the previous page as after; each page is an index range scan, so
+    deep pages cost the same as the first one.
+    """
+    columns = '''t.*, tf.label as timeframe_label, tf.granularity, tf.roadmap_id,
+                 tf.task_count as timeframe_task_count, tf.done_count as timeframe_done_count'''
     # Join to filter by roadmap via timeframe
-    query = '''SELECT t.*, tf.label as timeframe_label, tf.granularity 
-               FROM tasks t
-               JOIN timeframes tf ON t.timeframe_id = tf.id
-               WHERE tf.roadmap_id = ?'''
+    tables = " FROM timeframes tf JOIN tasks t ON t.timeframe_id = tf.id"
+    where = " WHERE tf.roadmap_id = ?"
     params = [roadmap_id]
     
     if timeframe_id:
-        query += " AND t.timeframe_id = ?"
+        where += " AND t.timeframe_id = ?"
         params.append(timeframe_id)
+
+    if subtree_of:
+        # Descendants follow their ancestor in the text, so the subtree's
+        # position span bounds the index range that has to be scanned
+        where += ''' AND tf.id IN (SELECT descendant_id FROM timeframe_paths WHERE ancestor_id = ?)
+                     AND tf.position BETWEEN (SELECT position FROM timeframes WHERE id = ?)
+                                         AND (SELECT MAX(d.position) FROM timeframe_paths p
+                                              JOIN timeframes d ON d.id = p.descendant_id
+                                              WHERE p.ancestor_id = ?)'''
+        params.extend([subtree_of, subtree_of, subtree_of])
         
-    c.execute(query, params)
-    res = [dict(row) for row in c.fetchall()]
-    conn.close()
+    # Matches the index order, so no sort step is needed
+    order = " ORDER BY tf.position, tf.id, t.position, t.id"
+    limit_clause = " LIMIT ?" if limit is not None else ""
+    limit_params = [limit] if limit is not None else []
+
+    if after is None:
+        query = "SELECT " + columns + tables + where + order + limit_clause
+        params += limit_params
+    else:
+        # Two range scans: the rest of the last page's timeframe, then the
+        # timeframes after it. Written as one OR, SQLite would only seek on
+        # timeframe_id and walk the current timeframe from its first task.
+        # part and tf_position carry the order across the halves and are
+        # dropped from the rows below.
+        after_tf_id, after_task_id = after
+        query = f'''SELECT * FROM (SELECT 0 AS part, tf.position AS tf_position, {columns}{tables}{where}
+                         AND t.timeframe_id = ?
+                         AND (t.position, t.id) > (SELECT position, id FROM tasks WHERE id = ?)
+                         ORDER BY t.position, t.id{limit_clause})
+                    UNION ALL
+                    SELECT * FROM (SELECT 1 AS part, tf.position AS tf_position, {columns}{tables}{where}
+                         AND (tf.position, tf.id) > (SELECT position, id FROM timeframes WHERE id = ?)
+                         {order}{limit_clause})
+                    ORDER BY part, tf_position, timeframe_id, position, id{limit_clause}'''
+        params = (params + [after_tf_id, after_task_id] + limit_params
+                  + params + [after_tf_id] + limit_params + limit_params)
+    pending = _pending_snapshot()
+    res = _fetch_all(query, params)
+    if after is not None:
+        for task in res:
+            del task['part'], task['tf_position']
+    if pending:
+        # Count toggles that are still waiting to be written, like get_timeframes
+        done_delta = {}
+        for change in pending.values():
+            tf_id = change['timeframe_id']
+            done_delta[tf_id] = done_delta.get(tf_id, 0) + change['is_done'] - change['committed']
+        for task in res:
+            change = pending.get(task['id'])
+            if change is not None:
+                task['is_done'] = change['is_done']
+            task['timeframe_done_count'] += done_delta.get(task['timeframe_id'], 0)
     return res
 
+def iter_tasks(roadmap_id, timeframe_id=None, batch_size=TASK_BATCH_SIZE, subtree_of=None):
+    """Yield the tasks of a roadmap in text order, fetched one keyset page at a time."""
+    after = None
+    while True:
+        page = get_tasks(roadmap_id, timeframe_id, after=after, limit=batch_size, subtree_of=subtree_of)
+        yield from page
+        if len(page) < batch_size:
+            return
+        after = (page[-1]['timeframe_id'], page[-1]['id'])
+
+def _fold(text):
+    # Lowercase without accents, like the index's unicode61 tokenizer
+    return "".join(ch for ch in unicodedata.normalize("NFKD", text.lower()) if not unicodedata.combining(ch))
+
+def _search_tiers(query):
+    # Candidate queries, best first: every word in the title, some word in the
+    # title, then every word anywhere (the timeframe label included). Words
+    # match as prefixes; quoting keeps FTS5 syntax out of user input.
+    terms = [f'"{word}"*' for word in re.findall(r"\w+", query)]
+    every = " ".join(terms)
+    tiers = [f"title : ({every})"]
+    if len(terms) > 1:
+        tiers.append(f"(title : ({' OR '.join(terms)})) AND ({every})")
+    tiers.append(every)
+    return tiers
+
+def search_tasks(query, limit=50):
+    """
+    Tasks across all roadmaps whose title or timeframe label matches every
+    word of query (as a prefix), best matches first.
+
+    Tasks matching more words in their title rank first, then shorter
+    titles, then newer tasks. Rows look like get_tasks rows plus roadmap_name.
+    """
+    words = [_fold(word) for word in re.findall(r"\w+", query)]
+    if not words:
+        return []
+    select = '''SELECT t.*, tf.label as timeframe_label, tf.granularity, tf.roadmap_id, r.name as roadmap_name'''
+    pending = _pending_snapshot()
+    window = max(limit, SEARCH_CANDIDATES)
+    try:
+        # bm25 has to count every match of each word to weigh it, which takes
+        # seconds for common words across a million tasks. Instead the newest
+        # matches of each tier fill a window of SEARCH_CANDIDATES rows, title
+        # matches before label-only ones, so thousands of tasks under a
+        # matching heading can't crowd out a task named after the query.
+        # Ranking the window is exact unless more tasks than that have every
+        # word in their title.
+        ids = []
+        seen = set()
+        with connection() as conn:
+            for match in _search_tiers(query):
+                for row in conn.execute('''SELECT rowid FROM task_search WHERE task_search MATCH ?
+                                           ORDER BY rowid DESC LIMIT ?''', (match, window)):
+                    if row[0] not in seen:
+                        seen.add(row[0])
+                        ids.append(row[0])
+                if len(ids) >= window:
+                    break
+        ids = ids[:window]
+        res = []
+        if ids:
+            res = _fetch_all(select + f'''
+                             FROM tasks t
+                             JOIN timeframes tf ON tf.id = t.timeframe_id
+                             JOIN roadmaps r ON r.id = tf.roadmap_id
+                             WHERE t.id IN ({", ".join("?" * len(ids))})
+                             ORDER BY t.id DESC''', ids)
+    except sqlite3.OperationalError as e:
+        if "no such table" not in str(e):
+            raise
+        # No FTS5 in this SQLite build: substring match, title matches first
+        where = " AND ".join(["(t.title LIKE ? OR tf.label LIKE ?)"] * len(words))
+        in_title = " AND ".join(["t.title LIKE ?"] * len(words))
+        params = [pattern for word in words for pattern in (f"%{word}%", f"%{word}%")]
+        res = _fetch_all(select + f'''
+                         FROM tasks t
+                         JOIN timeframes tf ON tf.id = t.timeframe_id
+                         JOIN roadmaps r ON r.id = tf.roadmap_id
+                         WHERE {where}
+                         ORDER BY ({in_title}) DESC, t.id DESC
+                         LIMIT ?''', params + [f"%{word}%" for word in words] + [window])
+
+    def score(task):
+        title_words = re.findall(r"\w+", _fold(task['title']))
+        title_hits = sum(1 for word in words if any(w.startswith(word) for w in title_words))
+        return (-title_hits, len(task['title']))
+
+    # Stable sort, so ties stay newest first
+    res.sort(key=score)
+    res = res[:limit]
+    if pending:
+        for task in res:
+            change = pending.get(task['id'])
+            if change is not None:
+                task['is_done'] = change['is_done']
+    return res
+
+def count_subtree_tasks(timeframe_id):
+    """Number of tasks under a timeframe and all of its nested timeframes."""
+    with connection() as conn:
+        row = conn.execute('''SELECT COALESCE(SUM(tf.task_count), 0)
+                              FROM timeframe_paths p JOIN timeframes tf ON tf.id = p.descendant_id
+                              WHERE p.ancestor_id = ?''', (timeframe_id,)).fetchone()
+    return row[0]
+
+def get_revision(roadmap_id):
+    """
+    Content revision of a roadmap; it changes whenever its tasks, timeframes
+    or name do. Queued checkbox toggles only count once flushed.
+    """
+    with connection() as conn:
+        row = conn.execute("SELECT revision FROM roadmap_progress WHERE roadmap_id = ?",
+                           (roadmap_id,)).fetchone()
+    return row['revision'] if row else None
+
 def update_task_status(task_id, is_done):
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("UPDATE tasks SET is_done = ? WHERE id = ?", (is_done, task_id))
-    conn.commit()
-    conn.close()
+    # A flush in flight could otherwise land after this write and undo it
+    with _flush_lock:
+        with _pending_lock:
+            _pending_status.pop(task_id, None)
+        with transaction() as c:
+            c.execute("UPDATE tasks SET is_done = ? WHERE id = ?", (is_done, task_id))
+
+def _pending_snapshot():
+    """Copy of the queued toggles, taken before a read so a flush racing the read can't hide a change."""
+    with _pending_lock:
+        if not _pending_status and not _inflight_status:
+            return {}
+        snapshot = {task_id: dict(change) for task_id, change in _inflight_status.items()}
+        for task_id, change in _pending_status.items():
+            # Toggled again while its earlier toggle is being written
+            inflight = snapshot.get(task_id)
+            snapshot[task_id] = dict(change, committed=inflight['committed']) if inflight else dict(change)
+        return snapshot
+
+def queue_task_status(task, is_done):
+    """
+    Record a checkbox toggle without writing it yet.
+
+    task is a row from get_tasks. Repeated flips of the same task collapse
+    into its final state, and flipping it back cancels the write altogether.
+    Queued toggles are written together in one transaction after
+    TASK_FLUSH_DELAY seconds or by flush_task_updates(); until then get_tasks,
+    get_timeframes and get_progress already report them.
+    """
+    is_done = 1 if is_done else 0
+    with _pending_lock:
+        change = _pending_status.get(task['id'])
+        if change:
+            committed = change['committed']
+        elif task['id'] in _inflight_status:
+            committed = _inflight_status[task['id']]['is_done']
+        else:
+            committed = 1 if task['is_done'] else 0
+        if is_done == committed:
+            _pending_status.pop(task['id'], None)
+        else:
+            _pending_status[task['id']] = {
+                "is_done": is_done,
+                "committed": committed,
+                "roadmap_id": task['roadmap_id'],
+                "timeframe_id": task['timeframe_id'],
+            }
+        _schedule_flush()
+
+def _schedule_flush():
+    # Caller holds _pending_lock
+    global _flush_timer
+    if _pending_status and _flush_timer is None:
+        _flush_timer = threading.Timer(TASK_FLUSH_DELAY, _flush_from_timer)
+        _flush_timer.daemon = True
+        _flush_timer.start()
+
+def _flush_from_timer():
+    # Nobody is there to catch an error on the timer thread; a failed batch is
+    # requeued and retried by the next timer
+    try:
+        flush_task_updates()
+    except sqlite3.Error as e:
+        print(f"Error writing queued task updates, will retry: {e}")
+
+def flush_task_updates():
+    """Write every queued checkbox toggle in a single transaction."""
+    global _flush_timer
+    with _flush_lock:
+        # Only the hand-over happens under _pending_lock. The write may wait on
+        # another writer's lock, and reads and toggles must not wait with it.
+        with _pending_lock:
+            if _flush_timer is not None:
+                _flush_timer.cancel()
+                _flush_timer = None
+            if not _pending_status:
+                return
+            _inflight_status.update(_pending_status)
+            _pending_status.clear()
+        try:
+            with transaction() as c:
+                c.executemany("UPDATE tasks SET is_done = ? WHERE id = ?",
+                              [(change['is_done'], task_id) for task_id, change in _inflight_status.items()])
+        except BaseException:
+            # Put the batch back in the queue, under any newer toggle of the same task
+            with _pending_lock:
+                for task_id, change in _inflight_status.items():
+                    newer = _pending_status.get(task_id)
+                    if newer is None:
+                        _pending_status[task_id] = change
+                    elif newer['is_done'] == change['committed']:
+                        del _pending_status[task_id]
+                    else:
+                        newer['committed'] = change['committed']
+                _inflight_status.clear()
+                _schedule_flush()
+            raise
+        with _pending_lock:
+            _inflight_status.clear()
+
+atexit.register(flush_task_updates)
+
+def update_task_statuses(changes):
+    """
+    Write many (task_id, is_done) changes in a single transaction.
+
+    Used by the task grid, which saves all of its edits at once. Any queued
+    toggle for the same tasks is dropped, the grid value wins.
+    """
+    rows = [(1 if is_done else 0, task_id) for task_id, is_done in changes]
+    if not rows:
+        return 0
+    with _flush_lock:
+        with _pending_lock:
+            for _, task_id in rows:
+                _pending_status.pop(task_id, None)
+        with transaction() as c:
+            c.executemany("UPDATE tasks SET is_done = ? WHERE id = ?", rows)
+    return len(rows)
 
 def delete_roadmap(roadmap_id):
-    conn = get_connection()
-    c = conn.cursor()
-    
-    # Delete tasks associated with timeframes of this roadmap
-    c.execute('''DELETE FROM tasks 
-                 WHERE timeframe_id IN (SELECT id FROM timeframes WHERE roadmap_id = ?)''', (roadmap_id,))
-    
-    # Delete timeframes
-    c.execute("DELETE FROM timeframes WHERE roadmap_id = ?", (roadmap_id,))
-    
-    # Delete roadmap
-    c.execute("DELETE FROM roadmaps WHERE id = ?", (roadmap_id,))
-    
-    conn.commit()
-    conn.close()
+    flush_task_updates()
+    with transaction() as c:
+        # Delete tasks associated with timeframes of this roadmap
+        c.execute('''DELETE FROM tasks 
+                     WHERE timeframe_id IN (SELECT id FROM timeframes WHERE roadmap_id = ?)''', (roadmap_id,))
+        
+        # Delete timeframes
+        c.execute("DELETE FROM timeframes WHERE roadmap_id = ?", (roadmap_id,))
+        
+        # Delete roadmap
+        c.execute("DELETE FROM roadmaps WHERE id = ?", (roadmap_id,))
 
 def rename_roadmap(roadmap_id, new_name):
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("UPDATE roadmaps SET name = ? WHERE id = ?", (new_name, roadmap_id))
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute("UPDATE roadmaps SET name = ? WHERE id = ?", (new_name, roadmap_id))
 
 def get_all_tasks_for_roadmap(roadmap_id):
     """Fetch all tasks for a roadmap, ordered by timeframe to help reconstruction."""
-    conn = get_connection()
-    c = conn.cursor()
     query = '''SELECT t.title, tf.label as timeframe_label
                FROM tasks t
                JOIN timeframes tf ON t.timeframe_id = tf.id
                WHERE tf.roadmap_id = ?
-               ORDER BY tf.id, t.id'''
-    c.execute(query, (roadmap_id,))
-    res = [dict(row) for row in c.fetchall()]
-    conn.close()
-    return res
+               ORDER BY t.position, t.id'''
+    return _fetch_all(query, (roadmap_id,))
+
+def _item_key(item):
+    """What a parsed item is compared on when diffing two versions of a roadmap."""
+    if item['type'] == 'timeframe':
+        return ('timeframe', item['label'])
+    return ('task', item['title'])
+
+def _link_items(items):
+    """
+    Resolve every parsed item to the index of the timeframe item it hangs off.
+
+    Timeframes get their parent's index (None at the top level); tasks get the
+    index of their timeframe, or -1 when they belong to "Unassigned".
+    The parser numbers timeframes in order, so its indexes translate to item
+    positions through a plain list, whatever the labels look like.
+    """
+    tf_positions = []  # timeframe index -> position in items
+    links = []
+    for idx, item in enumerate(items):
+        if item['type'] == 'timeframe':
+            parent_index = item['parent_index']
+            links.append(tf_positions[parent_index] if parent_index is not None else None)
+            tf_positions.append(idx)
+        else:
+            tf_index = item['timeframe_index']
+            links.append(tf_positions[tf_index] if tf_index is not None else -1)
+    return links
+
+def _load_item_rows(c, roadmap_id, items):
+    """
+    Line up the stored timeframe/task rows of a roadmap with the parsed items of its raw_text.
+
+    Returns (rows, unassigned_id) where rows[i] is the row for items[i], or None
+    when the stored rows don't mirror the text (e.g. rows written by older versions).
+    """
+    c.execute("SELECT id, label, granularity, parent_id, position FROM timeframes WHERE roadmap_id = ? ORDER BY position, id",
+              (roadmap_id,))
+    tf_rows = []
+    unassigned_id = None
+    for row in c.fetchall():
+        if row['granularity'] == 'generic' and unassigned_id is None:
+            unassigned_id = row['id']
+        else:
+            tf_rows.append(dict(row))
+
+    c.execute('''SELECT t.id, t.title, t.timeframe_id, t.position
+                 FROM tasks t
+                 JOIN timeframes tf ON t.timeframe_id = tf.id
+                 WHERE tf.roadmap_id = ?
+                 ORDER BY t.position, t.id''', (roadmap_id,))
+    task_rows = [dict(row) for row in c.fetchall()]
+
+    if len(tf_rows) + len(task_rows) != len(items):
+        return None
+
+    rows = []
+    tf_iter = iter(tf_rows)
+    task_iter = iter(task_rows)
+    for item in items:
+        if item['type'] == 'timeframe':
+            row = next(tf_iter, None)
+            if row is None or row['label'] != item['label']:
+                return None
+        else:
+            row = next(task_iter, None)
+            if row is None or row['title'] != item['title']:
+                return None
+        rows.append(row)
+    return rows, unassigned_id
+
+def _diff_items(old_items, new_items):
+    """
+    Line-diff two parsed versions of a roadmap.
+
+    Returns (matches, dropped): matches[j] is the index of the old item that
+    new item j keeps (same line, or a reworded line of the same type), or None
+    for a new line; dropped lists the indexes of old items that went away.
+    A changed line only counts as reworded when it is at least
+    REWORD_SIMILARITY alike to the old one; an unrelated replacement is a
+    new row, so it doesn't inherit the old task's completion state.
+    """
+    old_keys = [_item_key(item) for item in old_items]
+    new_keys = [_item_key(item) for item in new_items]
+    n_old = len(old_keys)
+    n_new = len(new_keys)
+
+    # Edits are usually local, so trim the common head and tail before diffing
+    head = 0
+    while head < n_old and head < n_new and old_keys[head] == new_keys[head]:
+        head += 1
+    tail = 0
+    while tail < n_old - head and tail < n_new - head and old_keys[-1 - tail] == new_keys[-1 - tail]:
+        tail += 1
+
+    matches = [None] * n_new
+    for k in range(head):
+        matches[k] = k
+    for k in range(1, tail + 1):
+        matches[n_new - k] = n_old - k
+
+    dropped = []
+    matcher = difflib.SequenceMatcher(None, old_keys[head:n_old - tail], new_keys[head:n_new - tail], autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            for k in range(i2 - i1):
+                matches[head + j1 + k] = head + i1 + k
+            continue
+
+        # Changed block: reuse old rows of the same type in order when the text
+        # is similar, so a reworded task keeps its id and completion state
+        for kind in ('timeframe', 'task'):
+            old_idx = [head + i for i in range(i1, i2) if old_items[head + i]['type'] == kind]
+            new_idx = [head + j for j in range(j1, j2) if new_items[head + j]['type'] == kind]
+            used = set()
+            start = 0
+            for j in new_idx:
+                for k in range(start, min(start + REWORD_LOOKAHEAD, len(old_idx))):
+                    i = old_idx[k]
+                    if _is_reworded(old_keys[i][1], new_keys[j][1]):
+                        matches[j] = i
+                        used.add(i)
+                        start = k + 1
+                        break
+            dropped.extend(i for i in old_idx if i not in used)
+    return matches, dropped
+
+def _is_reworded(old_text, new_text):
+    matcher = difflib.SequenceMatcher(None, old_text.lower(), new_text.lower(), autojunk=False)
+    # The quick upper bounds rule most unrelated lines out without the full ratio
+    return (matcher.real_quick_ratio() >= REWORD_SIMILARITY
+            and matcher.quick_ratio() >= REWORD_SIMILARITY
+            and matcher.ratio() >= REWORD_SIMILARITY)
+
+def _plan_positions(kept):
+    """
+    Positions for the new item order: kept rows keep theirs and new rows are
+    spread between their neighbours. Returns None when the kept positions are
+    out of order or a gap is too narrow, meaning everything must be renumbered.
+    """
+    positions = [row['position'] if row is not None else None for row in kept]
+    count = len(positions)
+    prev = None
+    j = 0
+    while j < count:
+        if kept[j] is not None:
+            if positions[j] is None or (prev is not None and positions[j] <= prev):
+                return None
+            prev = positions[j]
+            j += 1
+            continue
+
+        run_end = j
+        while run_end < count and kept[run_end] is None:
+            run_end += 1
+        run = run_end - j
+        nxt = positions[run_end] if run_end < count else None
+        if run_end < count and nxt is None:
+            return None
+        low = prev if prev is not None else (nxt - run - 1 if nxt is not None else -1.0)
+        high = nxt if nxt is not None else low + run + 1
+        step = (high - low) / (run + 1)
+        for k in range(run):
+            pos = low + step * (k + 1)
+            if (prev is not None and pos <= prev) or pos >= high:
+                return None
+            positions[j + k] = pos
+            prev = pos
+        j = run_end
+    return positions
+
+def _write_items(c, roadmap_id, items, kept, positions, unassigned_id):
+    """
+    Bring the rows of a roadmap in line with its parsed items.
+
+    kept[j] is the existing row for items[j] (None inserts a new one); existing
+    rows are only updated when their label/title, parent or position changed.
+    Returns the id of the "Unassigned" timeframe, if any.
+    """
+    links = _link_items(items)
+    row_ids = [None] * len(items)
+    now = datetime.now().isoformat()
+
+    for j, item in enumerate(items):
+        old = kept[j]
+        link = links[j]
+        if item['type'] == 'timeframe':
+            parent_id = row_ids[link] if link is not None else None
+            values = (item['label'], item['granularity'], parent_id, positions[j])
+            if old is None:
+                c.execute("INSERT INTO timeframes (roadmap_id, label, granularity, parent_id, position) VALUES (?, ?, ?, ?, ?)",
+                          (roadmap_id,) + values)
+                row_ids[j] = c.lastrowid
+            else:
+                row_ids[j] = old['id']
+                if values != (old['label'], old['granularity'], old['parent_id'], old['position']):
+                    c.execute("UPDATE timeframes SET label = ?, granularity = ?, parent_id = ?, position = ? WHERE id = ?",
+                              values + (old['id'],))
+        else:
+            if link == -1:
+                if unassigned_id is None:
+                    c.execute("INSERT INTO timeframes (roadmap_id, label, granularity, position) VALUES (?, ?, ?, ?)",
+                              (roadmap_id, "Unassigned", "generic", UNASSIGNED_POSITION))
+                    unassigned_id = c.lastrowid
+                tf_id = unassigned_id
+            else:
+                tf_id = row_ids[link]
+            values = (item['title'], tf_id, positions[j])
+            if old is None:
+                c.execute("INSERT INTO tasks (title, timeframe_id, position, created_at) VALUES (?, ?, ?, ?)",
+                          values + (now,))
+            elif values != (old['title'], old['timeframe_id'], old['position']):
+                c.execute("UPDATE tasks SET title = ?, timeframe_id = ?, position = ? WHERE id = ?",
+                          values + (old['id'],))
+    return unassigned_id
 
 def update_roadmap_content(roadmap_id, new_text, parser_func):
     """
     Update roadmap content by re-parsing the text.
-    This involves clearing existing timeframes/tasks and re-inserting them.
+
+    The old and new text are diffed line by line and only the rows for lines
+    that were added, removed or changed are written, so unchanged tasks keep
+    their ids and completion state. Rows that don't mirror the stored text
+    (e.g. written by older versions) are cleared and re-inserted instead.
     parser_func: The parse_roadmap function from parser.py (passed to avoid circular import if possible, or just import inside)
     """
-    # First, parse the new text to ensure it's valid before deleting anything
-    parsed_data = parser_func(new_text)
-    
-    conn = get_connection()
-    c = conn.cursor()
+    # First, parse the new text to ensure it's valid before touching anything.
+    # The old text is parsed up front too: a cached parser_func may write its
+    # disk tier, which would wait forever on the write lock held below.
+    new_items = parser_func(new_text)
+    old_text = get_roadmap_text(roadmap_id)
+    old_items = parser_func(old_text) if old_text else []
+    flush_task_updates()
     
     try:
-        # 1. Update raw_text in roadmaps table
-        c.execute("UPDATE roadmaps SET raw_text = ? WHERE id = ?", (new_text, roadmap_id))
-        
-        # 2. Delete existing tasks and timeframes
-        c.execute('''DELETE FROM tasks 
-                     WHERE timeframe_id IN (SELECT id FROM timeframes WHERE roadmap_id = ?)''', (roadmap_id,))
-        c.execute("DELETE FROM timeframes WHERE roadmap_id = ?", (roadmap_id,))
-        
-        # 3. Re-insert parsed data
-        # We need a way to map timeframe labels to IDs during insertion
-        # This logic mimics import_roadmap but within this transaction context
-        
-        # We'll use a local dictionary to track created timeframes in this session
-        # But since we are inside a function, we can just re-implement the saving logic using the cursor
-        
-        tf_map = {} # label -> id
-        
-        for item in parsed_data:
-            if item['type'] == 'task':
-                tf_label = item['timeframe_label']
-                granularity = item['granularity']
-                
-                if tf_label not in tf_map:
-                    c.execute("INSERT INTO timeframes (roadmap_id, label, granularity) VALUES (?, ?, ?)",
-                              (roadmap_id, tf_label, granularity))
-                    tf_map[tf_label] = c.lastrowid
-                
-                tf_id = tf_map[tf_label]
-                c.execute("INSERT INTO tasks (timeframe_id, title, created_at) VALUES (?, ?, ?)",
-                          (tf_id, item['title'], datetime.now().isoformat()))
-        
-        conn.commit()
+        with transaction() as c:
+            c.execute("SELECT raw_text FROM roadmaps WHERE id = ?", (roadmap_id,))
+            row = c.fetchone()
+            # Edited by someone else meanwhile: the rows no longer match old_items
+            if row and (row['raw_text'] or "") != old_text:
+                old_text = None
+            loaded = _load_item_rows(c, roadmap_id, old_items) if old_text else None
+
+            # 1. Update raw_text in roadmaps table
+            c.execute("UPDATE roadmaps SET raw_text = ? WHERE id = ?", (new_text, roadmap_id))
+
+            if loaded is None:
+                # 2a. Stored rows can't be matched up: clear and re-insert everything
+                c.execute('''DELETE FROM tasks 
+                             WHERE timeframe_id IN (SELECT id FROM timeframes WHERE roadmap_id = ?)''', (roadmap_id,))
+                c.execute("DELETE FROM timeframes WHERE roadmap_id = ?", (roadmap_id,))
+                _bulk_insert_items(c, roadmap_id, new_items)
+                return True
+
+            # 2. Keep the rows of unchanged lines, drop the rows of removed ones
+            old_rows, unassigned_id = loaded
+            matches, dropped = _diff_items(old_items, new_items)
+            kept = [old_rows[i] if i is not None else None for i in matches]
+            dropped_rows = [(old_items[i]['type'], old_rows[i]['id']) for i in dropped]
+            c.executemany("DELETE FROM tasks WHERE id = ?",
+                          [(row_id,) for kind, row_id in dropped_rows if kind == 'task'])
+
+            positions = _plan_positions(kept)
+            if positions is None:
+                positions = [float(j) for j in range(len(new_items))]
+
+            # 3. Insert new lines and update moved/reworded ones
+            unassigned_id = _write_items(c, roadmap_id, new_items, kept, positions, unassigned_id)
+
+            # 4. Timeframes can only go once nothing points at them anymore
+            c.executemany("DELETE FROM timeframes WHERE id = ?",
+                          [(row_id,) for kind, row_id in dropped_rows if kind == 'timeframe'])
+            if unassigned_id is not None:
+                c.execute("DELETE FROM timeframes WHERE id = ? AND NOT EXISTS (SELECT 1 FROM tasks WHERE timeframe_id = ?)",
+                          (unassigned_id, unassigned_id))
         return True
     except Exception as e:
-        conn.rollback()
         print(f"Error updating roadmap: {e}")
         return False
-    finally:
-        conn.close()
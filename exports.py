@@ -0,0 +1,417 @@
+"""
+Roadmap exports (PDF, TXT, DOCX, JPEG) and a cache of the generated files.
+
+Builders take a roadmap name and an iterable of its tasks in text order
+(db.iter_tasks) and return the file as bytes. get_export builds a file on demand and caches it
+keyed by the roadmap's content revision, so an unchanged roadmap is only
+rendered once per format and any edit or toggle invalidates it.
+"""
+import io
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+from functools import lru_cache
+
+import db
+from lazy import LazyModule
+
+# Loaded on first use, so importing this module stays cheap
+docx = LazyModule("docx")
+Image = LazyModule("PIL.Image")
+ImageDraw = LazyModule("PIL.ImageDraw")
+ImageFont = LazyModule("PIL.ImageFont")
+
+# Upper bound on the bytes held by the export cache, across all sessions
+EXPORT_CACHE_BYTES = 64 * 1024 * 1024
+
+# JPEG exports are split into pages of this size so long roadmaps never need one huge canvas
+JPEG_PAGE_WIDTH = 800
+JPEG_PAGE_HEIGHT = 1200
+JPEG_LINE_HEIGHT = 30
+JPEG_HEADER_HEIGHT = 60
+JPEG_PADDING = 20
+
+ZIP_SIGNATURE = b"PK\x03\x04"
+
+# Lines buffered by write_grouped_text before each write to its sink
+TEXT_CHUNK_LINES = 4096
+
+
+def _is_page_archive(fmt, data):
+    # Multi-page JPEG exports come back as a ZIP of pages. A DOCX is a ZIP
+    # too, so the signature alone can't tell them apart.
+    return fmt == "JPEG" and data is not None and data.startswith(ZIP_SIGNATURE)
+
+
+def build_pdf(roadmap_label, tasks):
+    """Generate a simple PDF of the roadmap tasks grouped by timeframe."""
+    try:
+        from fpdf import FPDF
+    except ImportError:
+        print("PDF generation requires the 'fpdf' package. Install with: pip install fpdf")
+        return None
+
+    # Helper to sanitize text for latin-1
+    def clean(text):
+        return text.encode('latin-1', 'replace').decode('latin-1')
+
+    # Group tasks by timeframe
+    grouped = {}
+    for t in tasks:
+        grouped.setdefault(t['timeframe_label'], []).append(t)
+
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Helvetica", "B", 16)
+    pdf.cell(0, 10, clean(roadmap_label), ln=True)
+    pdf.ln(4)
+
+    pdf.set_font("Helvetica", "", 12)
+    for timeframe, items in grouped.items():
+        pdf.set_font("Helvetica", "B", 13)
+        pdf.cell(0, 8, clean(timeframe), ln=True)
+        pdf.set_font("Helvetica", "", 11)
+        for idx, item in enumerate(items, start=1):
+            pdf.multi_cell(0, 7, f"- {clean(item['title'])}")
+        pdf.ln(2)
+
+    pdf_bytes = pdf.output(dest="S").encode("latin-1")
+    return pdf_bytes
+
+def write_grouped_text(tasks, sink, header=None, bracket_groups=True, show_status=True):
+    """
+    Write tasks as text lines grouped under their timeframe to a binary sink.
+
+    Headings come out as "[label]" (or the bare label) after a blank line and
+    tasks as "[x] title" (or the bare title). Lines are encoded and written
+    TEXT_CHUNK_LINES at a time, so the text is never built up as one string
+    and tasks can be streamed straight from db.iter_tasks.
+    """
+    lines = [header] if header else []
+    current_group = None
+    for task in tasks:
+        if task['timeframe_label'] != current_group:
+            current_group = task['timeframe_label']
+            lines.append(f"\n[{current_group}]\n" if bracket_groups else f"\n{current_group}\n")
+        if show_status:
+            status = "[x]" if task['is_done'] else "[ ]"
+            lines.append(f"{status} {task['title']}\n")
+        else:
+            lines.append(f"{task['title']}\n")
+        if len(lines) >= TEXT_CHUNK_LINES:
+            sink.write("".join(lines).encode('utf-8'))
+            lines.clear()
+    if lines:
+        sink.write("".join(lines).encode('utf-8'))
+
+def build_txt(roadmap_name, tasks):
+    buffer = io.BytesIO()
+    write_grouped_text(tasks, buffer, header=f"Roadmap: {roadmap_name}\n\n")
+    return buffer.getvalue()
+
+def build_docx(roadmap_name, tasks):
+    doc = docx.Document()
+    doc.add_heading(f"Roadmap: {roadmap_name}", 0)
+    
+    current_group = None
+    for task in tasks:
+        if task['timeframe_label'] != current_group:
+            current_group = task['timeframe_label']
+            doc.add_heading(current_group, level=2)
+        
+        status = " (Done)" if task['is_done'] else ""
+        doc.add_paragraph(f"{task['title']}{status}", style='List Bullet')
+    
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+@lru_cache(maxsize=None)
+def _load_font(size):
+    """Font for JPEG exports, loaded once per size and process."""
+    try:
+        # Try to load a nicer font, otherwise default
+        return ImageFont.truetype("arial.ttf", size)
+    except IOError:
+        return ImageFont.load_default()
+
+
+class _JpegPager:
+    """
+    Draws text lines onto fixed-size pages, keeping only the current page in memory.
+
+    Finished pages are encoded right away. The first one is held back until
+    a second page is needed; from then on pages are written into a ZIP.
+    """
+
+    def __init__(self):
+        self.output = io.BytesIO()
+        self.archive = None
+        self.first_page = None
+        self.page_count = 0
+        self.img = None
+        self.draw = None
+        self.y = 0
+        self._new_page()
+
+    def _new_page(self):
+        self.img = Image.new('RGB', (JPEG_PAGE_WIDTH, JPEG_PAGE_HEIGHT), color=(255, 255, 255))
+        self.draw = ImageDraw.Draw(self.img)
+        self.y = JPEG_PADDING
+
+    def _finish_page(self, crop=False):
+        img = self.img
+        if crop:
+            img = img.crop((0, 0, JPEG_PAGE_WIDTH, min(self.y + JPEG_PADDING, JPEG_PAGE_HEIGHT)))
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG")
+        self.img = self.draw = None
+        self.page_count += 1
+        if self.page_count == 1:
+            self.first_page = buffer.getvalue()
+            return
+        if self.archive is None:
+            # JPEG data doesn't compress further, so store pages as they are
+            self.archive = zipfile.ZipFile(self.output, "w", zipfile.ZIP_STORED)
+            self.archive.writestr("page-0001.jpg", self.first_page)
+            self.first_page = None
+        self.archive.writestr(f"page-{self.page_count:04d}.jpg", buffer.getvalue())
+
+    def fits(self, height):
+        return self.y + height <= JPEG_PAGE_HEIGHT - JPEG_PADDING
+
+    def break_page(self):
+        self._finish_page()
+        self._new_page()
+
+    def text(self, x, text, fill, font, height):
+        self.draw.text((x, self.y), text, fill=fill, font=font)
+        self.y += height
+
+    def skip(self, height):
+        self.y += height
+
+    def close(self):
+        """Finish the last page; returns a JPEG for a single page, a ZIP otherwise."""
+        self._finish_page(crop=True)
+        if self.archive is None:
+            return self.first_page
+        self.archive.close()
+        return self.output.getvalue()
+
+
+def build_jpeg(roadmap_name, tasks):
+    """
+    Render the roadmap as JPEG pages of fixed size, one page at a time.
+
+    Memory use doesn't grow with the number of tasks beyond the encoded
+    output. A roadmap that fits on one page comes back as a single JPEG,
+    longer ones as a ZIP of numbered pages.
+    """
+    font = _load_font(16)
+    header_font = _load_font(24)
+    pager = _JpegPager()
+    pager.text(JPEG_PADDING, f"Roadmap: {roadmap_name}", (0, 0, 0), header_font, JPEG_HEADER_HEIGHT)
+
+    current_group = None
+    for task in tasks:
+        if task['timeframe_label'] != current_group:
+            current_group = task['timeframe_label']
+            # Keep a heading on the same page as its first task
+            if not pager.fits(JPEG_LINE_HEIGHT * 3):
+                pager.break_page()
+            pager.skip(JPEG_LINE_HEIGHT)
+            pager.text(JPEG_PADDING, current_group, (0, 0, 150), font, JPEG_LINE_HEIGHT)
+        elif not pager.fits(JPEG_LINE_HEIGHT):
+            pager.break_page()
+            pager.text(JPEG_PADDING, f"{current_group} (continued)", (0, 0, 150), font, JPEG_LINE_HEIGHT)
+
+        status = "[x]" if task['is_done'] else "[ ]"
+        pager.text(JPEG_PADDING + 20, f"{status} {task['title']}", (0, 0, 0), font, JPEG_LINE_HEIGHT)
+
+    return pager.close()
+
+
+# format name -> (builder, mime type, file extension)
+EXPORT_FORMATS = {
+    "PDF": (build_pdf, "application/pdf", "pdf"),
+    "TXT": (build_txt, "text/plain", "txt"),
+    "DOCX": (build_docx, "application/vnd.openxmlformats-officedocument.wordprocessingml.document", "docx"),
+    "JPEG": (build_jpeg, "image/jpeg", "jpg"),
+}
+
+
+class ExportCache:
+    """
+    Generated exports keyed by (roadmap_id, revision, format).
+
+    Least recently used files are evicted once the cached bytes exceed
+    max_bytes. Storing a newer revision of a roadmap/format drops the older
+    ones right away, since they can never be asked for again.
+    """
+
+    def __init__(self, max_bytes=EXPORT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        roadmap_id, revision, fmt = key
+        with self._lock:
+            for old_key in [k for k in self._entries if k[0] == roadmap_id and k[2] == fmt]:
+                self.size -= len(self._entries.pop(old_key))
+            # A file bigger than the whole budget is served but not kept
+            if len(data) > self.max_bytes:
+                return
+            self._entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self.size,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+export_cache = ExportCache()
+
+
+def get_export(roadmap_id, roadmap_name, fmt):
+    """
+    Export a roadmap as fmt (a key of EXPORT_FORMATS).
+
+    Returns (data, mime, ext); data is None if the file couldn't be built.
+    Queued checkbox toggles are written first so the file and the revision
+    it's cached under include them.
+    """
+    builder, mime, ext = EXPORT_FORMATS[fmt]
+    db.flush_task_updates()
+    revision = db.get_revision(roadmap_id)
+    key = (roadmap_id, revision, fmt)
+    data = export_cache.get(key)
+    if data is None:
+        # Builders read the tasks once, in order, so they can stream them
+        try:
+            data = builder(roadmap_name, db.iter_tasks(roadmap_id))
+        except ImportError as e:
+            print(f"{fmt} export needs a package that isn't installed: {e}")
+            data = None
+        if data:
+            export_cache.put(key, data)
+    if _is_page_archive(fmt, data):
+        mime, ext = "application/zip", "zip"
+    return data, mime, ext
+
+
+# Formats that are already compressed are stored in bulk archives as they are
+_STORED_FORMATS = {"DOCX", "JPEG"}
+
+
+def _init_export_worker(db_file):
+    db.DB_FILE = db_file
+
+
+def _export_job(roadmap_id, roadmap_name, fmt):
+    """Build one export in a worker process; returns (data, ext)."""
+    builder, _, ext = EXPORT_FORMATS[fmt]
+    data = builder(roadmap_name, db.iter_tasks(roadmap_id))
+    if _is_page_archive(fmt, data):
+        ext = "zip"
+    return data, ext
+
+
+def safe_filename(name):
+    """A roadmap name made safe to use as a file or folder name: no separators, no leading dots."""
+    return re.sub(r'[\\/:*?"<>|\x00-\x1f]', "_", name).strip(" .") or "roadmap"
+
+
+def _archive_folder(name, used):
+    folder = safe_filename(name)
+    candidate = folder
+    counter = 2
+    while candidate.lower() in used:
+        candidate = f"{folder} ({counter})"
+        counter += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+def export_all_roadmaps(sink, formats=None, workers=None, progress=None):
+    """
+    Export every roadmap in every format into one ZIP written to sink.
+
+    formats defaults to all of EXPORT_FORMATS. The builders are CPU bound, so
+    they run in a process pool of `workers` processes (default: one per
+    CPU). Each file is added to the archive as soon as its worker finishes,
+    as "<roadmap>/<roadmap>.<ext>". progress, if given, is called as
+    progress(done, total) after every file. A failed export is reported and
+    skipped. Returns the number of files written.
+    """
+    # Pulls in multiprocessing, which only this job needs
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    formats = list(formats or EXPORT_FORMATS)
+    db.flush_task_updates()
+    roadmaps = db.get_roadmap_summaries()
+    used = set()
+    folders = {r['id']: _archive_folder(r['name'], used) for r in roadmaps}
+    total = len(roadmaps) * len(formats)
+    done = 0
+    written = 0
+    if progress:
+        progress(done, total)
+
+    # Spawned, not forked: a forked worker would inherit this process's pooled
+    # SQLite connections (unusable across a fork) and could copy db's queue
+    # lock while another thread (e.g. a Streamlit session) holds it
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as archive, \
+            ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                initializer=_init_export_worker, initargs=(db.DB_FILE,)) as pool:
+        jobs = {}
+        for roadmap in roadmaps:
+            for fmt in formats:
+                future = pool.submit(_export_job, roadmap['id'], roadmap['name'], fmt)
+                jobs[future] = (roadmap, fmt)
+
+        for future in as_completed(jobs):
+            roadmap, fmt = jobs.pop(future)
+            try:
+                data, ext = future.result()
+            except Exception as e:
+                data = None
+                print(f"Error exporting {roadmap['name']} as {fmt}: {e}")
+            if data:
+                folder = folders[roadmap['id']]
+                compression = zipfile.ZIP_STORED if fmt in _STORED_FORMATS else zipfile.ZIP_DEFLATED
+                archive.writestr(f"{folder}/{folder}.{ext}", data, compress_type=compression)
+                written += 1
+            done += 1
+            if progress:
+                progress(done, total)
+    return written
@@ -0,0 +1,31 @@
+"""
+Deferred imports for the heavy optional libraries (python-docx, Pillow, pandas).
+
+    Image = LazyModule("PIL.Image")
+    Image.new(...)          # PIL.Image is imported here, on first use
+
+Keeps these imports off the startup path of the app and the CLI; only
+the code paths that export or show the task grid pay for them.
+"""
+import importlib
+
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            # import_module holds the import lock, so racing threads get the same module
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule {self._name!r} ({state})>"
@@ -1,4 +1,29 @@
 import re
+import hashlib
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+# Bump whenever the parse output changes, so cached results of an older grammar are never reused
+GRAMMAR_VERSION = 2
+
+# Single-pass line tokenizer. Alternatives are tried in hierarchy order, so a
+# line is classified by one match instead of one regex per heading level.
+# Headings are case insensitive; task bullets are -, *, • or numbered 1.
+LINE_TOKENIZER = re.compile(
+    r'(?P<month>month\s*\d+.*)'
+    r'|(?P<week>week\s*\d+.*)'
+    r'|(?P<day>day\s*\d+.*)'
+    r'|(?P<hour>hour\s*\d+.*)'
+    r'|(?:[-*•]|\d+\.)\s*(?P<task>.*)',
+    re.IGNORECASE
+)
+
+# Small-int codes used by the columns of CompactParse
+TIMEFRAME, TASK = 0, 1
+GRANULARITIES = ("generic", "month", "week", "day", "hour")
+GRANULARITY_CODES = {name: code for code, name in enumerate(GRANULARITIES)}
 
 def parse_roadmap(text):
     """
@@ -10,128 +35,387 @@ def parse_roadmap(text):
             - label: (for timeframe) e.g., "Week 1"
             - granularity: (for timeframe) "month", "week", "day", "hour"
             - parent_label: (for timeframe) label of the parent timeframe
+            - index: (for timeframe) its number among the timeframes, from 0
+            - parent_index: (for timeframe) index of the parent timeframe, or None
             - timeframe_label: (for task) which timeframe it belongs to
+            - timeframe_index: (for task) index of that timeframe, or None for "Unassigned"
             - title: (for task) task text
+
+        Indexes identify a heading even when its label repeats, e.g. "Week 1"
+        under every month, and let callers map them to rows with a plain list.
     """
-    lines = text.split('\n')
-    
+    return list(iter_parse(text))
+
+
+class ParseCache:
+    """
+    Parse results keyed by a hash of the text and the grammar version.
+
+    The most recently used results are kept in an in-process LRU bounded by
+    entry count and by the total length of their source texts (a parsed list
+    takes roughly ten times the memory of its text). Texts longer than
+    max_chars are parsed but not kept. Cached lists are shared between
+    callers and must be treated as read-only.
+
+    There is no persistent tier: loading a stored result (as JSON, ~4x the
+    size of the text) takes about as long as parsing the text again.
+    """
+
+    def __init__(self, max_entries=32, max_chars=8_000_000):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (items, len(text))
+        self._chars = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text):
+        digest = hashlib.sha256(text.encode('utf-8'))
+        return f"v{GRAMMAR_VERSION}:{digest.hexdigest()}"
+
+    def parse(self, text):
+        key = self.key(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        items = parse_roadmap(text)
+        with self._lock:
+            self.misses += 1
+
+        if len(text) > self.max_chars:
+            return items
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (items, len(text))
+                self._chars += len(text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries or self._chars > self.max_chars:
+                _, (_, size) = self._entries.popitem(last=False)
+                self._chars -= size
+        return items
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "chars": self._chars,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._chars = 0
+
+
+parse_cache = ParseCache()
+
+
+def parse_roadmap_cached(text):
+    """parse_roadmap backed by the shared parse cache; the result is read-only."""
+    return parse_cache.parse(text)
+
+
+
+def _iter_text_lines(text):
+    """Yield the lines of a string one at a time without splitting it up front."""
+    start = 0
+    while True:
+        end = text.find('\n', start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
+def iter_parse(source):
+    """
+    Lazily parses roadmap lines, yielding one timeframe/task item at a time.
+
+    source can be a string, a file handle or any iterable of lines, so large
+    roadmaps never have to be held in memory as a whole. Items have the same
+    shape as the ones returned by parse_roadmap.
+    """
+    if isinstance(source, str):
+        source = _iter_text_lines(source)
+
     # Context trackers
     current_month = None
     current_week = None
     current_day = None
     current_hour = None
+    # ...and the node index of each open heading
+    month_index = None
+    week_index = None
+    day_index = None
+    hour_index = None
+    next_index = 0
     
-    parsed_data = []
-    
-    # Regex patterns
-    # Case insensitive matching for headings
-    re_month = re.compile(r'^(month\s*\d+.*)', re.IGNORECASE)
-    re_week = re.compile(r'^(week\s*\d+.*)', re.IGNORECASE)
-    re_day = re.compile(r'^(day\s*\d+.*)', re.IGNORECASE)
-    re_hour = re.compile(r'^(hour\s*\d+.*)', re.IGNORECASE)
-    
-    # Task bullets: -, *, •, or numbered 1.
-    re_task = re.compile(r'^(\s*[-*•]|\s*\d+\.)\s*(.*)')
-
-    for line in lines:
+    for line in source:
         line = line.strip()
         if not line:
             continue
-            
-        # Check for headings (Hierarchy: Month > Week > Day > Hour)
-        
-        # Month
-        m_match = re_month.match(line)
-        if m_match:
-            label = m_match.group(1)
+
+        # One match classifies the line (Hierarchy: Month > Week > Day > Hour,
+        # then bullets); lastgroup names the alternative that matched.
+        match = LINE_TOKENIZER.match(line)
+        kind = match.lastgroup if match else None
+
+        if kind == "month":
+            label = match.group("month")
             current_month = label
             current_week = None
             current_day = None
             current_hour = None
-            parsed_data.append({
+            month_index, week_index, day_index, hour_index = next_index, None, None, None
+            next_index += 1
+            yield {
                 "type": "timeframe",
                 "label": label,
                 "granularity": "month",
-                "parent_label": None
-            })
+                "parent_label": None,
+                "index": month_index,
+                "parent_index": None
+            }
             continue
-            
-        # Week
-        w_match = re_week.match(line)
-        if w_match:
-            label = w_match.group(1)
+
+        if kind == "week":
+            label = match.group("week")
             current_week = label
             current_day = None
             current_hour = None
-            parsed_data.append({
+            week_index, day_index, hour_index = next_index, None, None
+            next_index += 1
+            yield {
                 "type": "timeframe",
                 "label": label,
                 "granularity": "week",
-                "parent_label": current_month
-            })
+                "parent_label": current_month,
+                "index": week_index,
+                "parent_index": month_index
+            }
             continue
-            
-        # Day
-        d_match = re_day.match(line)
-        if d_match:
-            label = d_match.group(1)
+
+        if kind == "day":
+            label = match.group("day")
             current_day = label
             current_hour = None
-            parsed_data.append({
+            day_index, hour_index = next_index, None
+            next_index += 1
+            yield {
                 "type": "timeframe",
                 "label": label,
                 "granularity": "day",
-                "parent_label": current_week or current_month
-            })
+                "parent_label": current_week or current_month,
+                "index": day_index,
+                "parent_index": week_index if week_index is not None else month_index
+            }
             continue
-            
-        # Hour
-        h_match = re_hour.match(line)
-        if h_match:
-            label = h_match.group(1)
+
+        if kind == "hour":
+            label = match.group("hour")
             current_hour = label
-            parsed_data.append({
+            hour_index = next_index
+            next_index += 1
+            if day_index is not None:
+                parent_index = day_index
+            elif week_index is not None:
+                parent_index = week_index
+            else:
+                parent_index = month_index
+            yield {
                 "type": "timeframe",
                 "label": label,
                 "granularity": "hour",
-                "parent_label": current_day or current_week or current_month
-            })
+                "parent_label": current_day or current_week or current_month,
+                "index": hour_index,
+                "parent_index": parent_index
+            }
             continue
-            
-        # Check for Task
-        # We now allow any line that isn't a header to be a task, even without bullets
-        # But we still check for bullets to strip them if present
-        t_match = re_task.match(line)
-        task_text = line
-        if t_match:
-            task_text = t_match.group(2).strip()
+
+        # Any line that isn't a header is a task, even without bullets,
+        # but bullets are stripped when present
+        if kind == "task":
+            task_text = match.group("task").strip()
         else:
             # If no bullet, just take the whole line
-            task_text = line.strip()
+            task_text = line
 
         # Determine most specific context
         timeframe_label = "Unassigned"
         granularity = "generic"
+        timeframe_index = None
         
         if current_hour:
             timeframe_label = current_hour
             granularity = "hour"
+            timeframe_index = hour_index
         elif current_day:
             timeframe_label = current_day
             granularity = "day"
+            timeframe_index = day_index
         elif current_week:
             timeframe_label = current_week
             granularity = "week"
+            timeframe_index = week_index
         elif current_month:
             timeframe_label = current_month
             granularity = "month"
+            timeframe_index = month_index
         
-        parsed_data.append({
+        yield {
             "type": "task",
             "title": task_text,
             "timeframe_label": timeframe_label,
-            "granularity": granularity
-        })
-        continue
-            
-    return parsed_data
+            "granularity": granularity,
+            "timeframe_index": timeframe_index
+        }
+
+
+class CompactParse:
+    """
+    A parse result stored in parallel array columns instead of one dict per item.
+
+    For every item it keeps the kind and granularity as small ints, the
+    (start, end) offsets of its label or title in the source text, and a link:
+    the parent's timeframe index for a timeframe, the owning timeframe's index
+    for a task, -1 for none. That is about 20 bytes an item against several
+    hundred for a dict and its strings.
+
+    Indexing and iteration build the same dicts parse_roadmap returns, one at a
+    time, so it can be passed wherever a list of items is read.
+    """
+
+    __slots__ = ("text", "kinds", "granularities", "starts", "ends", "links", "timeframe_positions")
+
+    def __init__(self, text):
+        self.text = text
+        self.kinds = array('B')
+        self.granularities = array('B')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.links = array('i')
+        self.timeframe_positions = array('i')  # timeframe index -> item position
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __iter__(self):
+        for position in range(len(self.kinds)):
+            yield self[position]
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += len(self.kinds)
+        text = self.text[self.starts[position]:self.ends[position]]
+        granularity = GRANULARITIES[self.granularities[position]]
+        link = self.links[position]
+        if self.kinds[position] == TIMEFRAME:
+            return {
+                "type": "timeframe",
+                "label": text,
+                "granularity": granularity,
+                "parent_label": self.label(link),
+                "index": bisect_left(self.timeframe_positions, position),
+                "parent_index": link if link >= 0 else None
+            }
+        return {
+            "type": "task",
+            "title": text,
+            "timeframe_label": self.label(link) if link >= 0 else "Unassigned",
+            "granularity": granularity,
+            "timeframe_index": link if link >= 0 else None
+        }
+
+    def label(self, index):
+        """Label of the timeframe with the given index, or None for -1."""
+        if index < 0:
+            return None
+        position = self.timeframe_positions[index]
+        return self.text[self.starts[position]:self.ends[position]]
+
+    def _append(self, kind, granularity, start, end, link):
+        self.kinds.append(kind)
+        self.granularities.append(granularity)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.links.append(link)
+
+
+def parse_roadmap_compact(text):
+    """
+    Parses roadmap text like parse_roadmap, into a CompactParse.
+
+    Meant for very large roadmaps, where a dict per line would cost far more
+    memory than the text itself. The result keeps a reference to text.
+    """
+    result = CompactParse(text)
+    # Node index of each open heading, -1 when there is none
+    month = week = day = hour = -1
+    next_index = 0
+
+    start = 0
+    length = len(text)
+    while start <= length:
+        end = text.find('\n', start)
+        if end == -1:
+            end = length
+        line = text[start:end]
+        line_start = start
+        start = end + 1
+
+        stripped = line.strip()
+        if not stripped:
+            continue
+        offset = line_start + len(line) - len(line.lstrip())
+        line_end = offset + len(stripped)
+
+        match = LINE_TOKENIZER.match(stripped)
+        kind = match.lastgroup if match else None
+
+        if kind is None or kind == "task":
+            if kind == "task":
+                title = match.group("task")
+                title_start = offset + match.start("task") + len(title) - len(title.lstrip())
+                title_end = title_start + len(title.strip())
+            else:
+                title_start, title_end = offset, line_end
+            if hour >= 0:
+                link, granularity = hour, "hour"
+            elif day >= 0:
+                link, granularity = day, "day"
+            elif week >= 0:
+                link, granularity = week, "week"
+            elif month >= 0:
+                link, granularity = month, "month"
+            else:
+                link, granularity = -1, "generic"
+            result._append(TASK, GRANULARITY_CODES[granularity], title_start, title_end, link)
+            continue
+
+        # Same parent rules as iter_parse: the nearest open heading above this level
+        if kind == "month":
+            parent = -1
+            month, week, day, hour = next_index, -1, -1, -1
+        elif kind == "week":
+            parent = month
+            week, day, hour = next_index, -1, -1
+        elif kind == "day":
+            parent = week if week >= 0 else month
+            day, hour = next_index, -1
+        else:
+            parent = day if day >= 0 else week if week >= 0 else month
+            hour = next_index
+        next_index += 1
+        result.timeframe_positions.append(len(result))
+        result._append(TIMEFRAME, GRANULARITY_CODES[kind],
+                       offset + match.start(kind), offset + match.end(kind), parent)
+    return result
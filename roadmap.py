@@ -0,0 +1,150 @@
+"""
+Command line access to the roadmap database, without starting Streamlit.
+
+    python -m roadmap import plans/*.txt
+    python -m roadmap export --format pdf --output archive.zip
+    python -m roadmap export --roadmap "Learn Rust" --format txt
+    python -m roadmap stats
+
+Only the modules a command needs are imported, so startup stays fast;
+the export libraries are loaded by the export command alone. Exports
+never replace an existing file unless --force is given.
+"""
+import argparse
+import os
+import sys
+
+import db
+
+
+def cmd_import(args):
+    import parser
+
+    imported = 0
+    for path in args.files:
+        name = os.path.splitext(os.path.basename(path))[0].strip()
+        if db.roadmap_name_exists(name):
+            print(f"Skipping {path}: a roadmap named '{name}' already exists.", file=sys.stderr)
+            continue
+        try:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+        except OSError as e:
+            print(f"Skipping {path}: {e}", file=sys.stderr)
+            continue
+        if not text.strip():
+            print(f"Skipping {path}: file is empty.", file=sys.stderr)
+            continue
+
+        result = db.bulk_import_roadmap(name, text, parser.parse_roadmap_compact(text))
+        if result is None:
+            continue
+        _, count_tf, count_tasks = result
+        imported += 1
+        print(f"Imported '{name}': {count_tf} timeframes, {count_tasks} tasks")
+    print(f"{imported} of {len(args.files)} files imported.")
+    return 0 if imported == len(args.files) else 1
+
+
+def cmd_export(args):
+    import exports
+
+    formats = args.format or list(exports.EXPORT_FORMATS)
+
+    if args.roadmap is None:
+        output = args.output or "roadmaps.zip"
+        if not can_write(output, args.force):
+            return 1
+        files = {"total": 0}
+
+        def report(done, total):
+            files["total"] = total
+            print(f"\r{done}/{total} files", end="", file=sys.stderr, flush=True)
+
+        with open(output, "wb") as sink:
+            written = exports.export_all_roadmaps(sink, formats, workers=args.workers, progress=report)
+        print(file=sys.stderr)
+        print(f"Wrote {written} files to {output}")
+        if written < files["total"]:
+            print(f"{files['total'] - written} exports failed.", file=sys.stderr)
+            return 1
+        return 0
+
+    roadmap = next((r for r in db.get_roadmap_summaries() if r['name'].lower() == args.roadmap.lower()), None)
+    if roadmap is None:
+        print(f"No roadmap named '{args.roadmap}'.", file=sys.stderr)
+        return 1
+    if args.output and len(formats) > 1:
+        print(f"Ignoring --output: {len(formats)} formats requested, each goes to <name>.<ext>.", file=sys.stderr)
+    # Names come from users (or file names), so keep them from pointing elsewhere
+    base = exports.safe_filename(roadmap['name'])
+    status = 0
+    for fmt in formats:
+        data, _, ext = exports.get_export(roadmap['id'], roadmap['name'], fmt)
+        if not data:
+            status = 1
+            continue
+        output = args.output if args.output and len(formats) == 1 else f"{base}.{ext}"
+        if not can_write(output, args.force):
+            status = 1
+            continue
+        with open(output, "wb") as f:
+            f.write(data)
+        print(f"Wrote {output}")
+    return status
+
+
+def can_write(path, force):
+    """Whether an export may be written to path; existing files are only replaced with --force."""
+    if os.path.exists(path) and not force:
+        print(f"Not overwriting {path}; pass --force to replace it.", file=sys.stderr)
+        return False
+    return True
+
+
+def cmd_stats(args):
+    roadmaps = db.get_roadmap_summaries()
+    if not roadmaps:
+        print("No roadmaps.")
+        return 0
+    width = max(len(r['name']) for r in roadmaps)
+    for r in roadmaps:
+        counts = db.get_progress(r['id'])
+        percent = int(counts['done'] / counts['total'] * 100) if counts['total'] else 0
+        print(f"{r['name']:<{width}}  {counts['done']:>6}/{counts['total']:<6} {percent:>3}%  {r['created_at'][:10]}")
+    return 0
+
+
+def build_arg_parser():
+    arg_parser = argparse.ArgumentParser(prog="roadmap", description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--db", default=db.DB_FILE, help="database file (default: %(default)s)")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    import_cmd = commands.add_parser("import", help="import roadmap text files, named after the file")
+    import_cmd.add_argument("files", nargs="+")
+    import_cmd.set_defaults(func=cmd_import)
+
+    export_cmd = commands.add_parser("export", help="export one roadmap, or all of them into a ZIP")
+    export_cmd.add_argument("--format", action="append", type=str.upper,
+                            choices=["PDF", "TXT", "DOCX", "JPEG"],
+                            help="repeat for several formats (default: all)")
+    export_cmd.add_argument("--roadmap", help="name of a single roadmap to export")
+    export_cmd.add_argument("--output", help="output file (default: roadmaps.zip, or <name>.<ext>)")
+    export_cmd.add_argument("--workers", type=int, help="export processes for a full export")
+    export_cmd.add_argument("--force", action="store_true", help="overwrite existing output files")
+    export_cmd.set_defaults(func=cmd_export)
+
+    stats_cmd = commands.add_parser("stats", help="list roadmaps with their progress")
+    stats_cmd.set_defaults(func=cmd_stats)
+    return arg_parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    db.DB_FILE = args.db
+    db.init_db()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+Tests for db.search_tasks.
+
+Run with: python -m pytest tests  (or python -m unittest discover tests)
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+import parser
+
+
+class SearchTasksTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.old_db_file = db.DB_FILE
+        db.DB_FILE = os.path.join(self.tmp.name, "test.db")
+        db.init_db()
+
+    def tearDown(self):
+        db.close_connections()
+        db.DB_FILE = self.old_db_file
+        self.tmp.cleanup()
+
+    def import_text(self, text):
+        db.bulk_import_roadmap("test", text, parser.parse_roadmap(text))
+
+    def test_title_match_beats_a_crowded_heading(self):
+        # The heading's tasks are newer and outnumber the candidate window
+        exercises = "\n".join(f"- Exercise {n}" for n in range(db.SEARCH_CANDIDATES + 100))
+        self.import_text("Week 1\n- Learn Kubernetes basics\nWeek 2 - Kubernetes\n" + exercises)
+
+        results = db.search_tasks("kubernetes", limit=5)
+
+        self.assertEqual(results[0]['title'], "Learn Kubernetes basics")
+        self.assertEqual(len(results), 5)
+
+    def test_partial_title_match_ranks_above_label_only(self):
+        exercises = "\n".join(f"- Exercise {n}" for n in range(db.SEARCH_CANDIDATES + 100))
+        self.import_text("Week 1 - Kubernetes\n- Deploy a cluster\nWeek 2 - Kubernetes deploy\n" + exercises)
+
+        results = db.search_tasks("kubernetes deploy", limit=3)
+
+        self.assertEqual(results[0]['title'], "Deploy a cluster")
+
+    def test_every_word_must_match(self):
+        self.import_text("Week 1\n- Install Python\n- Install Go")
+
+        self.assertEqual([task['title'] for task in db.search_tasks("install py")], ["Install Python"])
+        self.assertEqual(db.search_tasks("rust"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
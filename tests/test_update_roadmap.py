@@ -0,0 +1,143 @@
+"""
+Tests for editing a roadmap's text: db.update_roadmap_content and the diff and
+position planning behind it.
+
+Run with: python -m pytest tests  (or python -m unittest discover tests)
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+import parser
+
+
+class UpdateRoadmapTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.old_db_file = db.DB_FILE
+        db.DB_FILE = os.path.join(self.tmp.name, "test.db")
+        db.init_db()
+
+    def tearDown(self):
+        db.close_connections()
+        db.DB_FILE = self.old_db_file
+        self.tmp.cleanup()
+
+    def import_text(self, text):
+        roadmap_id, _, _ = db.bulk_import_roadmap("test", text, parser.parse_roadmap(text))
+        return roadmap_id
+
+    def edit(self, roadmap_id, text):
+        self.assertTrue(db.update_roadmap_content(roadmap_id, text, parser.parse_roadmap))
+        return {task['title']: task for task in db.get_tasks(roadmap_id)}
+
+    def mark_done(self, roadmap_id, *titles):
+        tasks = {task['title']: task for task in db.get_tasks(roadmap_id)}
+        db.update_task_statuses([(tasks[title]['id'], True) for title in titles])
+        return tasks
+
+    def test_unchanged_tasks_keep_id_and_state(self):
+        roadmap_id = self.import_text("Week 1\n- Install Python\n- Read chapter 1\nWeek 2\n- Write a script")
+        before = self.mark_done(roadmap_id, "Read chapter 1")
+
+        after = self.edit(roadmap_id, "Week 1\n- Set up an editor\n- Install Python\n- Read chapter 1\n"
+                                      "Week 2\n- Write a script")
+
+        for title in ("Install Python", "Read chapter 1", "Write a script"):
+            self.assertEqual(after[title]['id'], before[title]['id'])
+        self.assertTrue(after["Read chapter 1"]['is_done'])
+        self.assertFalse(after["Set up an editor"]['is_done'])
+        self.assertEqual(list(after), ["Set up an editor", "Install Python", "Read chapter 1", "Write a script"])
+
+    def test_reworded_task_keeps_state(self):
+        roadmap_id = self.import_text("Week 1\n- Read chapter 1\n- Take notes")
+        before = self.mark_done(roadmap_id, "Read chapter 1")
+
+        after = self.edit(roadmap_id, "Week 1\n- Read chapter 1 and 2\n- Take notes")
+
+        self.assertEqual(after["Read chapter 1 and 2"]['id'], before["Read chapter 1"]['id'])
+        self.assertTrue(after["Read chapter 1 and 2"]['is_done'])
+
+    def test_replaced_tasks_do_not_inherit_state(self):
+        roadmap_id = self.import_text("Week 1\n- Install Python\n- Read chapter 1\n- Take notes")
+        before = self.mark_done(roadmap_id, "Install Python", "Read chapter 1")
+
+        after = self.edit(roadmap_id, "Week 1\n- Learn Kubernetes\n- Deploy cluster to production\n- Take notes")
+
+        self.assertFalse(after["Learn Kubernetes"]['is_done'])
+        self.assertFalse(after["Deploy cluster to production"]['is_done'])
+        self.assertNotIn(after["Learn Kubernetes"]['id'], {task['id'] for task in before.values()})
+        self.assertEqual(db.get_progress(roadmap_id), {"total": 3, "done": 0})
+
+    def test_repeated_labels_keep_their_parents(self):
+        roadmap_id = self.import_text("Month 1\nWeek 1\n- a\nMonth 2\nWeek 1\n- b")
+
+        after = self.edit(roadmap_id, "Month 1\nWeek 1\n- a\n- a2\nMonth 2\nWeek 1\n- b")
+
+        timeframes = {tf['id']: tf for tf in db.get_timeframes(roadmap_id)}
+        parent_of = {title: timeframes[timeframes[task['timeframe_id']]['parent_id']]['label']
+                     for title, task in after.items()}
+        self.assertEqual(parent_of, {"a": "Month 1", "a2": "Month 1", "b": "Month 2"})
+
+    def test_rows_not_matching_the_text_are_rewritten(self):
+        # Rows written without raw_text, as older versions did
+        roadmap_id = db.save_roadmap("legacy", "")
+        with db.transaction() as c:
+            c.execute("INSERT INTO timeframes (roadmap_id, label, granularity, position) VALUES (?, 'Old', 'week', 0)",
+                      (roadmap_id,))
+            c.execute("INSERT INTO tasks (timeframe_id, title, created_at, position) VALUES (?, 'stale', '', 0)",
+                      (c.lastrowid,))
+
+        after = self.edit(roadmap_id, "Week 1\n- fresh")
+
+        self.assertEqual(list(after), ["fresh"])
+        self.assertEqual([tf['label'] for tf in db.get_timeframes(roadmap_id)], ["Week 1"])
+        self.assertEqual(db.get_progress(roadmap_id), {"total": 1, "done": 0})
+
+
+class DiffItemsTest(unittest.TestCase):
+
+    def test_only_similar_lines_are_matched(self):
+        old = parser.parse_roadmap("Week 1\n- Install Python\n- Read chapter 1")
+        new = parser.parse_roadmap("Week 1\n- Install Python 3.12\n- Deploy cluster to production")
+
+        matches, dropped = db._diff_items(old, new)
+
+        self.assertEqual(matches, [0, 1, None])
+        self.assertEqual(dropped, [2])
+
+    def test_identical_text_matches_everything(self):
+        items = parser.parse_roadmap("Month 1\nWeek 1\n- a\n- b\nWeek 2\n- c")
+
+        matches, dropped = db._diff_items(items, items)
+
+        self.assertEqual(matches, list(range(len(items))))
+        self.assertEqual(dropped, [])
+
+
+class PlanPositionsTest(unittest.TestCase):
+
+    def test_new_rows_go_between_their_neighbours(self):
+        kept = [{'position': 1.0}, None, None, {'position': 4.0}, None]
+
+        positions = db._plan_positions(kept)
+
+        self.assertEqual(positions[0], 1.0)
+        self.assertEqual(positions[3], 4.0)
+        self.assertTrue(1.0 < positions[1] < positions[2] < 4.0)
+        self.assertGreater(positions[4], 4.0)
+
+    def test_out_of_order_rows_need_renumbering(self):
+        self.assertIsNone(db._plan_positions([{'position': 3.0}, {'position': 2.0}]))
+
+    def test_missing_position_needs_renumbering(self):
+        self.assertIsNone(db._plan_positions([None, {'position': None}]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,6 @@
+import hashlib
+import re
+from collections import namedtuple
 
 def get_cyberpunk_theme():
     return """
@@ -525,3 +528,160 @@ def get_antigravity_theme():
         }
     </style>
     """
+
+def get_shell_css():
+    """UI shell styling for nav dots, theme list, and slide animation; shared by every theme."""
+    return """
+    <style>
+        /* section[data-testid="stSidebar"] {display: none;} */
+        .main .block-container {max-width: 1250px; padding: 0.8rem 1rem 1.8rem 1rem;}
+        .page-title {margin: 0 0 1rem 0; font-size: 40px; font-weight: 800; color: #e7edf7;}
+        /* tighten column padding */
+        div[data-testid="column"] {padding-left: 6px !important; padding-right: 6px !important;}
+        /* bolder labels */
+        label[data-testid="stMetricLabel"], .stTextInput label, .stTextArea label, .stSelectbox label {
+            font-size: 16px !important;
+            font-weight: 800 !important;
+            color: #e7edf7 !important;
+        }
+        /* Global Button Styling - Unified */
+        button[data-testid^="stBaseButton-"] {
+            border: none !important;
+            background: linear-gradient(90deg, var(--primary), var(--accent)) !important;
+            color: #000000 !important;
+            font-weight: 700 !important;
+            text-transform: uppercase;
+            letter-spacing: 0.05em;
+            border-radius: 8px !important;
+            padding: 0.5rem 1rem !important;
+            box-shadow: 0 4px 14px rgba(0,0,0,0.25);
+            transition: transform 0.15s ease, box-shadow 0.2s ease;
+        }
+        
+        button[data-testid^="stBaseButton-"]:hover {
+            transform: translateY(-2px);
+            /* Use theme primary color for glow */
+            box-shadow: 0 0 20px var(--primary) !important; 
+        }
+
+        /* Force text styling inside buttons */
+        button[data-testid^="stBaseButton-"] p, 
+        button[data-testid^="stBaseButton-"] div,
+        .stDownloadButton > button p,
+        .stDownloadButton > button div {
+            color: #000000 !important;
+        }
+
+        /* Active/Click Effect */
+        button[data-testid^="stBaseButton-"]:active,
+        .stDownloadButton > button:active {
+            transform: translateY(1px) !important;
+            box-shadow: 0 0 10px var(--primary) !important;
+        }
+        /* keep download button simple - actually unify it too */
+        .stDownloadButton>button {
+            border: none !important;
+            background: linear-gradient(90deg, var(--primary), var(--accent)) !important;
+            color: #000000 !important;
+            font-weight: 700 !important;
+            text-transform: uppercase;
+            letter-spacing: 0.05em;
+            border-radius: 8px !important;
+            padding: 0.5rem 1rem !important;
+            box-shadow: 0 4px 14px rgba(0,0,0,0.25);
+            transition: transform 0.15s ease, box-shadow 0.2s ease;
+        }
+        .stDownloadButton>button:hover {
+            transform: translateY(-2px);
+            box-shadow: 0 0 20px var(--primary) !important;
+        }
+
+        /* pointer cursor on selects */
+        .stSelectbox label {cursor: pointer;}
+        .stSelectbox div[data-baseweb="select"] > div {cursor: pointer;}
+
+        /* Nav dots */
+        .nav-dots [role="radiogroup"] {gap: 2rem !important; justify-content: center;}
+        .nav-dots label {
+            padding: 6px 10px 6px 28px;
+            margin: 0;
+            position: relative;
+            cursor: pointer;
+            font-size: 22px;
+            font-weight: 700;
+            letter-spacing: 0.01em;
+            color: #e7edf7;
+        }
+        .nav-dots label div:first-of-type {display: none;} /* hide default radio icon */
+        .nav-dots label div:last-of-type {
+            color: inherit;
+            font-size: inherit;
+            font-weight: inherit;
+        }
+        .nav-dots label::before {
+            content: "";
+            position: absolute;
+            left: 0;
+            top: 50%;
+            transform: translateY(-50%);
+            width: 14px;
+            height: 14px;
+            border-radius: 50%;
+            border: 2px solid #6b768a;
+            background: transparent;
+        }
+        .nav-dots label:has(input:checked)::before {
+            background: var(--primary);
+            border-color: var(--primary);
+            box-shadow: 0 0 0 4px rgba(255, 255, 255, 0.1);
+        }
+
+
+
+        .page-shell {animation: slideIn 0.35s ease;}
+        @keyframes slideIn {from {opacity: 0; transform: translateY(8px);} to {opacity: 1; transform: translateY(0);}}
+    </style>
+    """
+
+
+# Theme registry. Every theme's CSS is minified once, at import, together
+# with the shell CSS, so a rerun only hands Streamlit a ready-made string.
+
+Theme = namedtuple("Theme", ["name", "css", "hash"])
+
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_CSS_SPACE = re.compile(r"\s+")
+_CSS_PUNCTUATION = re.compile(r"\s*([{};,>])\s*")
+
+
+def minify_css(html: str) -> str:
+    """Strip comments and layout whitespace from a <style> block."""
+    css = _CSS_COMMENT.sub("", html)
+    css = _CSS_SPACE.sub(" ", css)
+    css = _CSS_PUNCTUATION.sub(r"\1", css)
+    css = css.replace(";}", "}").replace("> <", "><")
+    return css.strip()
+
+
+def _build_theme(name: str, html: str) -> Theme:
+    css = minify_css(get_shell_css() + html)
+    return Theme(name, css, hashlib.sha256(css.encode("utf-8")).hexdigest()[:12])
+
+
+THEMES = {
+    name: _build_theme(name, builder())
+    for name, builder in [
+        ("Cyberpunk", get_cyberpunk_theme),
+        ("Sunset Neon", get_sunset_neon_theme),
+        ("Aqua Glow", get_aqua_glow_theme),
+        ("Ember Glow", get_ember_glow_theme),
+        ("Titanium", get_titanium_theme),
+        ("Anti Gravity", get_antigravity_theme),
+    ]
+}
+
+
+def page_css(theme_name: str) -> str:
+    """Shell plus theme CSS, ready to inject; unknown names fall back to the first theme."""
+    theme = THEMES.get(theme_name) or next(iter(THEMES.values()))
+    return theme.css